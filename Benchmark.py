@@ -0,0 +1,620 @@
+"""Mesures de performance du générateur de fichiers .strm.
+
+Utilisation :
+    python Benchmark.py playlist 100000 synthetic.m3u8
+    python Benchmark.py pipeline [--sizes 10000 100000 1000000] [--json results.json]
+    python Benchmark.py workers [--entries 20000] [--out /dev/shm/strm-bench]
+    python Benchmark.py shards [--entries 200000] [--counts 1 2 4 8]
+    python Benchmark.py cache [--entries 200000]
+    python Benchmark.py compressed [--entries 200000]
+    python Benchmark.py xtream [--entries 100000]
+    python Benchmark.py xtream-server [--entries 10000] [--port 8080]
+    python Benchmark.py startup [--runs 5] [--max-ms 150]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import Script
+
+######################################################################################################################
+                                   # Outils communs
+######################################################################################################################
+
+def make_context(out_directory, **overrides):
+    """RunContext minimal pour les mesures (aucun téléchargement ni notification)."""
+    values = dict(
+        base_directory=out_directory,
+        out_directory=out_directory,
+        m3u8_file=os.path.join(out_directory, "bench.m3u8"),
+        sources=(),
+        tv_sub_dir="TV",
+        prefix_del=("FR -", "UK -", "DE -", "ES -"),
+        manifest_file=os.path.join(out_directory, "manifest.db"),
+        prune_enabled=False,
+        prune_dry_run=False,
+        prune_max_percent=10.0,
+        workers=1,
+        download_timeout=60.0,
+        download_retries=3,
+        download_compressed=False,
+        xtream_api_enabled=False,
+        xtream_workers=8,
+        metrics_file="",
+        metrics_prom_file="",
+        profile_enabled=False,
+        log_compress_days=0.0,
+        log_retention_days=0.0,
+        shards=1,
+        parse_cache=False,
+        checkpoint_interval=0.0,
+        season_folders=False,
+        series_nfo=False,
+        dedup_enabled=False,
+        dedup_quality=Script.parse_quality_preference(Script.DEDUP_QUALITY_DEFAULT),
+        watch_interval=3600.0,
+        download_enabled=False,
+        user_url="",
+        user_port="",
+        user_name="",
+        user_pass="",
+        telegram_enabled=False,
+        telegram_token="",
+        telegram_chat_id="",
+        telegram_api_url=Script.TELEGRAM_API_URL,
+        discord_webhook_url="",
+        webhook_url="",
+        notify_timeout=10.0,
+        notify_retries=2,
+        notify_deadline=0.0,
+        notify_digest=False,
+    )
+    values.update(overrides)
+    return Script.RunContext(**values)
+
+def default_output_root():
+    """Dossier de sortie en mémoire (tmpfs) si disponible."""
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+def code_version():
+    """Révision git du script mesuré, pour comparer les résultats entre versions."""
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+######################################################################################################################
+                                   # Playlist synthétique
+######################################################################################################################
+
+TV_GROUPS = ("|EU| FRANCE HEVC", "|EU| FRANCE FHD", "|UK| SPORTS", "|DE| ALLGEMEIN", "|AR| عام")
+VOD_GROUPS = ("VOD - FR", "VOD - FR HEVC", "VOD - 4K", "VOD - ANIMATION", "FR - DOCUMENTAIRES")
+SERIES_GROUPS = ("SRS - SERIES FR", "SRS - NETFLIX", "SRS - ANIME VOSTFR")
+TITLE_WORDS = ("Le", "Retour", "du", "Amélie", "Ça", "Été", "Noël", "東京", "Ñandú", "Straße", "Nuit", "Étoile",
+               "Mission", "Ombre", "Jeux", "Dragon", "L'Odyssée", "Océan", "Forêt", "Cœur")
+PREFIXES = ("FR - ", "UK - ", "DE - ", "")
+
+def synthetic_entry(rng, index):
+    """Renvoie (group-title, tvg-name) d'une entrée réaliste : TV |XX|, film, épisode ou groupe vide."""
+    draw = rng.random()
+    prefix = rng.choice(PREFIXES)
+    if draw < 0.2:
+        return rng.choice(TV_GROUPS), f"{prefix}CHAÎNE {index % 500} {rng.choice(('HEVC', 'FHD', 'HD', '4K'))}"
+    title = " ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 4)))
+    if draw < 0.55:
+        return rng.choice(VOD_GROUPS), f"{prefix}{title} ({rng.randint(1960, 2025)})"
+    if draw < 0.97:
+        series = index // 200
+        return (rng.choice(SERIES_GROUPS),
+                f"{prefix}{title} {series} S{rng.randint(1, 12):02d} E{rng.randint(1, 24):02d}")
+    return "", f"{prefix}{title}: sans groupe ?"
+
+def generate_playlist(path, entries, seed=0):
+    """Écrit une playlist M3U synthétique au format de example-original.m3u8."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as playlist:
+        playlist.write("#EXTM3U\n")
+        for index in range(entries):
+            group_title, tvg_name = synthetic_entry(rng, index)
+            playlist.write(f'#EXTINF:-1 tvg-id="id{index}" tvg-name="{tvg_name}" '
+                           f'tvg-logo="http://example.com/logos/{index}.png" group-title="{group_title}",{tvg_name}\n')
+            if index % 50 == 0:
+                playlist.write("#EXTVLCOPT:http-user-agent=VLC/3.0\n")
+            playlist.write(f"http://example.com/live/user/pass/{index}.ts\n")
+
+def synthetic_group_filter():
+    return Script.GroupFilter.from_lines(["VOD - ANIMATION", "glob:|AR| *"])
+
+######################################################################################################################
+                                   # Étapes du traitement
+######################################################################################################################
+
+def timed(stages, name, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    stages[name] = round(time.perf_counter() - start, 4)
+    return result
+
+def bench_pipeline(entries, out_root, workers=1, seed=0):
+    """Mesure séparément les étapes parse, filter, plan et write d'une génération complète."""
+    work_directory = tempfile.mkdtemp(prefix="strm-bench-", dir=out_root)
+    try:
+        config = make_context(work_directory, workers=workers)
+        generate_playlist(config.m3u8_file, entries, seed)
+        group_filter = synthetic_group_filter()
+        stages = {}
+
+        parsed = timed(stages, "parse", lambda: list(Script.iter_m3u_entries(config.m3u8_file)))
+        kept = timed(stages, "filter", lambda: [(kind, entry) for entry in parsed
+                                                 if (kind := group_filter.classify(entry.group_title)) is not None])
+
+        def plan_entries():
+            manifest = Script.Manifest(config.manifest_file)
+            plan = Script.WritePlan()
+            for entry, kind, directory, file_title, fingerprint in Script.iter_targets(
+                    config, group_filter, (entry for _, entry in kept)):
+                action = Script.plan_strm(kind, entry, directory, file_title, manifest, fingerprint)
+                if action is None:
+                    plan.unchanged += 1
+                else:
+                    plan.add(action)
+            manifest.close()
+            return plan
+
+        plan = timed(stages, "plan", plan_entries)
+        statuses = timed(stages, "write", Script.execute_write_plan, plan, config)
+
+        total = sum(stages.values())
+        return {
+            "entries": entries,
+            "parsed": len(parsed),
+            "kept": len(kept),
+            "planned_writes": len(plan.actions),
+            "directories": len(plan.directories),
+            "files_written": statuses.count(Script.STRM_NEW),
+            "playlist_bytes": os.path.getsize(config.m3u8_file),
+            "workers": workers,
+            "stages_s": stages,
+            "total_s": round(total, 4),
+            "entries_per_s": round(entries / total) if total else None,
+        }
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+######################################################################################################################
+                                   # Écriture parallèle
+######################################################################################################################
+
+def synthetic_write_plan(entries, per_directory=50):
+    """Plan d'écriture synthétique : `entries` fichiers répartis par dossiers de `per_directory`."""
+    plan = Script.WritePlan()
+    for index in range(entries):
+        directory = os.path.join("OTHERS", f"Groupe {index // 5000}", f"Serie {index // per_directory}")
+        plan.add(Script.StrmAction(Script.GROUP_OTHERS, f"Groupe {index // 5000}", directory,
+                                   f"Episode {index}", f"http://example.com/{index}.ts", ""))
+    return plan
+
+def bench_workers(entries, out_root, worker_counts=(1, 4, 16)):
+    plan = synthetic_write_plan(entries)
+    results = {}
+    for workers in worker_counts:
+        out_directory = tempfile.mkdtemp(prefix="strm-bench-", dir=out_root)
+        try:
+            config = make_context(out_directory, workers=workers)
+            start = time.perf_counter()
+            statuses = Script.execute_write_plan(plan, config)
+            elapsed = time.perf_counter() - start
+        finally:
+            shutil.rmtree(out_directory, ignore_errors=True)
+        assert statuses.count(Script.STRM_NEW) == entries
+        results[workers] = elapsed
+        print(f"*** {workers:>2} threads : {entries} fichiers en {elapsed:.2f} s ({entries / elapsed:.0f} fichiers/s)")
+    return results
+
+######################################################################################################################
+                                   # Répartition sur plusieurs processus
+######################################################################################################################
+
+def bench_shards(entries, out_root, shard_counts):
+    """Mesure le filtre et le nommage (iter_targets / iter_sharded_targets) selon le nombre de processus."""
+    work_directory = tempfile.mkdtemp(prefix="strm-bench-", dir=out_root)
+    try:
+        generate_playlist(os.path.join(work_directory, "bench.m3u8"), entries)
+        group_filter = synthetic_group_filter()
+        results = {}
+        for shards in shard_counts:
+            config = make_context(work_directory, shards=shards)
+            # Nouveau cache de noms pour chaque mesure
+            Script._sanitizers.clear()
+            entries_iter = Script.iter_m3u_entries(config.m3u8_file)
+            if shards > 1:
+                targets = Script.iter_sharded_targets(config, group_filter, entries_iter)
+            else:
+                targets = Script.iter_targets(config, group_filter, entries_iter)
+            start = time.perf_counter()
+            count = sum(1 for _ in targets)
+            elapsed = time.perf_counter() - start
+            results[shards] = elapsed
+            print(f"*** {shards:>2} processus : {count} entrées en {elapsed:.2f} s ({count / elapsed:.0f} entrées/s)")
+        return results
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+def bench_cache(entries, out_root):
+    """Compare l'analyse de la playlist, la construction de <playlist>.cache et sa relecture."""
+    work_directory = tempfile.mkdtemp(prefix="strm-bench-", dir=out_root)
+    try:
+        playlist = os.path.join(work_directory, "bench.m3u8")
+        generate_playlist(playlist, entries)
+
+        def consume(iterator):
+            return sum(1 for _ in iterator)
+
+        stages = {}
+        timed(stages, "parse", consume, Script.iter_m3u_entries(playlist))
+        timed(stages, "build", consume, Script.iter_playlist_entries(playlist, cache=True))
+        timed(stages, "load", consume, Script.iter_playlist_entries(playlist, cache=True))
+        timed(stages, "groups", Script.scan_group_counts, playlist, True)
+        for name, elapsed in stages.items():
+            print(f"*** {name:<6} : {entries} entrées en {elapsed:.2f} s")
+        print(f"*** Cache : {os.path.getsize(playlist + Script.PLAYLIST_CACHE_SUFFIX)} octets "
+              f"(playlist : {os.path.getsize(playlist)} octets), relecture {stages['parse'] / stages['load']:.1f}x plus rapide.")
+        return stages
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+def compress_playlist(path, compression):
+    """Écrit path.gz, path.xz ou path.zst ; renvoie son chemin, ou None si le format n'est pas disponible."""
+    if compression == "gzip":
+        import gzip
+        target, opener = f"{path}.gz", gzip.open
+    elif compression == "xz":
+        import lzma
+        target, opener = f"{path}.xz", lzma.open
+    else:
+        try:
+            from compression import zstd
+            target, opener = f"{path}.zst", zstd.open
+        except ImportError:
+            try:
+                import zstandard
+            except ImportError:
+                return None
+            target, opener = f"{path}.zst", zstandard.open
+    with open(path, 'rb') as source, opener(target, 'wb') as compressed:
+        shutil.copyfileobj(source, compressed)
+    return target
+
+def bench_compressed(entries, out_root, compressions=("gzip", "xz", "zstd")):
+    """Compare le débit de lecture (iter_m3u_entries) d'une playlist en clair et compressée."""
+    work_directory = tempfile.mkdtemp(prefix="strm-bench-", dir=out_root)
+    try:
+        playlist = os.path.join(work_directory, "bench.m3u8")
+        generate_playlist(playlist, entries)
+        plain_size = os.path.getsize(playlist)
+        inputs = [("plain", playlist)]
+        for compression in compressions:
+            target = compress_playlist(playlist, compression)
+            if target is None:
+                print(f"*** {compression} : module indisponible, mesure ignorée.")
+            else:
+                inputs.append((compression, target))
+
+        results = {}
+        for name, path in inputs:
+            start = time.perf_counter()
+            count = sum(1 for _ in Script.iter_m3u_entries(path))
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(path)
+            results[name] = {"seconds": round(elapsed, 4), "bytes": size}
+            print(f"*** {name:<5} : {size / 1e6:7.1f} Mo ({size * 100 / plain_size:5.1f} %), {count} entrées en "
+                  f"{elapsed:.2f} s ({plain_size / 1e6 / elapsed:.0f} Mo/s décompressés)")
+        return results
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+######################################################################################################################
+                                   # Serveur Xtream Codes de substitution (player_api.php et get.php)
+######################################################################################################################
+
+class XtreamCatalog:
+    """Catalogue player_api.php synthétique : chaînes |XX| en live, épisodes S01 E01 en séries, le reste en films."""
+
+    def __init__(self, entries, seed=0):
+        rng = random.Random(seed)
+        self.categories = {kind: {} for kind, _, _ in Script.XTREAM_KINDS}  # type -> {nom: category_id}
+        self.streams = {}  # (type, category_id) -> flux ou séries
+        self.series_info = {}  # series_id -> réponse de get_series_info
+        series_ids = {}
+        for index in range(entries):
+            group_title, tvg_name = synthetic_entry(rng, index)
+            episode = Script.parse_episode(tvg_name) if group_title in SERIES_GROUPS else None
+            kind = "live" if group_title in TV_GROUPS else "series" if episode else "movie"
+            category_id = self.categories[kind].setdefault(group_title, str(len(self.categories[kind]) + 1))
+            streams = self.streams.setdefault((kind, category_id), [])
+            if kind == "series":
+                # Une série toutes les 200 entrées (comme synthetic_entry), nommée d'après son premier épisode
+                series_name, season, episode_num, _ = episode
+                series_id = series_ids.get((category_id, index // 200))
+                if series_id is None:
+                    series_id = series_ids[(category_id, index // 200)] = len(series_ids) + 1
+                    streams.append({"series_id": series_id, "name": series_name, "category_id": category_id,
+                                    "cover": f"http://example.com/covers/{series_id}.jpg"})
+                    self.series_info[series_id] = {"info": {"name": series_name}, "episodes": {}}
+                self.series_info[series_id]["episodes"].setdefault(str(season), []).append(
+                    {"id": str(index), "episode_num": episode_num, "season": season, "title": tvg_name,
+                     "container_extension": "mkv"})
+            else:
+                streams.append({"stream_id": index, "name": tvg_name, "category_id": category_id,
+                                "stream_icon": f"http://example.com/logos/{index}.png",
+                                "epg_channel_id": f"id{index}" if kind == "live" else None,
+                                "container_extension": "mkv"})
+
+    def respond(self, action, params):
+        for kind, categories_action, streams_action in Script.XTREAM_KINDS:
+            if action == categories_action:
+                return [{"category_id": category_id, "category_name": name, "parent_id": 0}
+                        for name, category_id in self.categories[kind].items()]
+            if action == streams_action:
+                return self.streams.get((kind, params.get("category_id")), [])
+        if action == "get_series_info":
+            return self.series_info.get(int(params.get("series_id", 0)))
+        return {"user_info": {"auth": 1}}
+
+class LocalXtreamClient:
+    """Même interface que Script.XtreamClient, sans réseau (playlist get.php du serveur de substitution)."""
+
+    def __init__(self, catalog, base_url, user_name, user_pass):
+        self.catalog = catalog
+        self.base_url = base_url
+        self.user_name = user_name
+        self.user_pass = user_pass
+
+    def get(self, action, **params):
+        return self.catalog.respond(action, {key: str(value) for key, value in params.items()}) or []
+
+    def stream_url(self, kind, stream_id, extension):
+        return f"{self.base_url}/{kind}/{self.user_name}/{self.user_pass}/{stream_id}.{extension}"
+
+class XtreamStandInHandler(BaseHTTPRequestHandler):
+    """player_api.php (JSON) et get.php (playlist m3u_plus complète) à partir de server.catalog."""
+
+    protocol_version = "HTTP/1.1"  # Connexions persistantes, comme un vrai serveur (pool de la session)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        if url.path == "/player_api.php":
+            body = json.dumps(self.server.catalog.respond(params.get("action"), params)).encode('utf-8')
+            content_type = "application/json"
+        elif url.path == "/get.php":
+            client = LocalXtreamClient(self.server.catalog, f"http://{self.headers['Host']}",
+                                       params.get("username"), params.get("password"))
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                lines = ["#EXTM3U\n"] + [Script.format_extinf(entry)
+                                         for entry in Script.iter_xtream_entries(client, executor)]
+            body = "".join(lines).encode('utf-8')
+            content_type = "audio/x-mpegurl"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_xtream_server(entries, port=0):
+    """Démarre le serveur de substitution dans un thread ; renvoie le serveur (server.server_port)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), XtreamStandInHandler)
+    server.catalog = XtreamCatalog(entries)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.bytes_sent = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def bench_xtream(entries, out_root):
+    """Compare get.php (playlist complète puis filtre) et player_api.php (catégories voulues seulement)."""
+    work_directory = tempfile.mkdtemp(prefix="strm-bench-", dir=out_root)
+    server = start_xtream_server(entries)
+    try:
+        config = make_context(work_directory, user_url="http://127.0.0.1", user_port=f":{server.server_port}",
+                              user_name="user", user_pass="pass")
+        group_filter = synthetic_group_filter()
+        results = {}
+        kept = {}
+        for name in ("m3u_plus", "player_api"):
+            path = os.path.join(work_directory, f"{name}.m3u8")
+            server.requests = server.bytes_sent = 0
+            start = time.perf_counter()
+            if name == "m3u_plus":
+                Script.fetch_playlist(Script.playlist_url(config), path)
+            else:
+                Script.fetch_xtream(config, path, group_filter)
+            kept[name] = [entry for entry in Script.iter_m3u_entries(path)
+                          if group_filter.classify(entry.group_title) is not None]
+            elapsed = time.perf_counter() - start
+            results[name] = {"seconds": round(elapsed, 4), "bytes": server.bytes_sent, "requests": server.requests}
+            print(f"*** {name:<10} : {server.requests} requêtes, {server.bytes_sent / 1e6:.1f} Mo reçus, "
+                  f"{len(kept[name])} entrées retenues en {elapsed:.2f} s")
+        print(f"*** Entrées retenues identiques : {kept['m3u_plus'] == kept['player_api']}")
+        return results
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+######################################################################################################################
+                                   # Temps de démarrage
+######################################################################################################################
+
+# Dépendances lourdes qui ne doivent être chargées que si l'option correspondante est activée
+HEAVY_MODULES = ("requests", "telegram", "httpx", "multiprocessing", "asyncio", "xml.sax.saxutils", "urllib.request")
+
+def heavy_modules(modules):
+    """Modules de HEAVY_MODULES (ou leurs sous-modules) présents dans modules."""
+    return sorted({heavy for heavy in HEAVY_MODULES for module in modules
+                   if module == heavy or module.startswith(heavy + ".")})
+
+def parse_importtime(stderr, root="Script"):
+    """Renvoie {module: temps cumulé en µs} de `root` et des modules qu'il importe (python -X importtime)."""
+    lines = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, module = line.split("|")
+        depth = len(module) - len(module.lstrip())
+        lines.append((module.strip(), int(cumulative_us), depth))
+
+    # Un module est affiché après ses imports, avec une indentation plus faible
+    for index, (module, cumulative_us, depth) in enumerate(lines):
+        if module == root:
+            timings = {root: cumulative_us}
+            for child, child_us, child_depth in reversed(lines[:index]):
+                if child_depth <= depth:
+                    break
+                timings[child] = child_us
+            return timings
+    raise ValueError(f"{root} absent de la sortie de -X importtime")
+
+def bench_startup(runs=5):
+    """Importe Script dans un interpréteur neuf (python -X importtime) ; garde la plus rapide des mesures."""
+    script_directory = os.path.dirname(os.path.abspath(__file__))
+    command = [sys.executable, "-X", "importtime", "-c", "import Script"]
+    # Premier import non compté : il compile le bytecode
+    subprocess.run(command, cwd=script_directory, capture_output=True, check=True)
+    best = None
+    for _ in range(runs):
+        completed = subprocess.run(command, cwd=script_directory, capture_output=True, text=True, check=True)
+        timings = parse_importtime(completed.stderr)
+        if best is None or timings["Script"] < best["Script"]:
+            best = timings
+
+    slowest = sorted(((module, us) for module, us in best.items() if module != "Script"),
+                     key=lambda item: item[1], reverse=True)[:10]
+    return {
+        "import_ms": round(best["Script"] / 1000, 1),
+        "heavy_modules": heavy_modules(best),
+        "slowest_imports_ms": {module: round(us / 1000, 1) for module, us in slowest},
+    }
+
+######################################################################################################################
+                                   # Ligne de commande
+######################################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesures de performance du générateur de fichiers .strm.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    workers_parser = subparsers.add_parser("workers", help="Compare l'écriture avec 1, 4 et 16 threads.")
+    workers_parser.add_argument("--entries", type=int, default=20000)
+    workers_parser.add_argument("--out", default=default_output_root(),
+                                help="Dossier de sortie (un montage réseau montre l'intérêt des threads).")
+
+    playlist_parser = subparsers.add_parser("playlist", help="Génère une playlist synthétique.")
+    playlist_parser.add_argument("entries", type=int)
+    playlist_parser.add_argument("path")
+    playlist_parser.add_argument("--seed", type=int, default=0)
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="Mesure les étapes parse/filter/plan/write.")
+    pipeline_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    pipeline_parser.add_argument("--workers", type=int, default=1)
+    pipeline_parser.add_argument("--out", default=default_output_root())
+    pipeline_parser.add_argument("--json", help="Fichier de résultats JSON (sortie standard par défaut).")
+
+    shards_parser = subparsers.add_parser("shards", help="Compare le filtre et le nommage sur 1 à N processus.")
+    shards_parser.add_argument("--entries", type=int, default=200000)
+    shards_parser.add_argument("--counts", type=int, nargs="+",
+                               default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    shards_parser.add_argument("--out", default=default_output_root())
+
+    cache_parser = subparsers.add_parser("cache", help="Compare l'analyse de la playlist et la relecture du cache binaire.")
+    cache_parser.add_argument("--entries", type=int, default=200000)
+    cache_parser.add_argument("--out", default=default_output_root())
+
+    compressed_parser = subparsers.add_parser("compressed", help="Compare la lecture d'une playlist en clair et compressée.")
+    compressed_parser.add_argument("--entries", type=int, default=200000)
+    compressed_parser.add_argument("--out", default=default_output_root())
+
+    xtream_parser = subparsers.add_parser("xtream", help="Compare get.php et player_api.php sur un serveur local.")
+    xtream_parser.add_argument("--entries", type=int, default=100000)
+    xtream_parser.add_argument("--out", default=default_output_root())
+
+    xtream_server_parser = subparsers.add_parser("xtream-server",
+                                                 help="Serveur Xtream Codes de substitution (player_api.php, get.php).")
+    xtream_server_parser.add_argument("--entries", type=int, default=10000)
+    xtream_server_parser.add_argument("--port", type=int, default=8080)
+
+    startup_parser = subparsers.add_parser("startup", help="Mesure le temps d'import de Script.py (python -X importtime).")
+    startup_parser.add_argument("--runs", type=int, default=5)
+    startup_parser.add_argument("--max-ms", type=float,
+                                help="Échec (code 1) si l'import dépasse cette durée, en millisecondes.")
+
+    args = parser.parse_args()
+    if args.command == "startup":
+        report = bench_startup(args.runs)
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        # Garde-fou contre les régressions : dépendance lourde chargée au démarrage ou import trop lent
+        if report["heavy_modules"]:
+            print(f"*** Modules lourds importés au démarrage : {', '.join(report['heavy_modules'])}")
+            sys.exit(1)
+        if args.max_ms is not None and report["import_ms"] > args.max_ms:
+            print(f"*** Import de Script.py trop lent : {report['import_ms']} ms > {args.max_ms} ms")
+            sys.exit(1)
+    elif args.command == "xtream":
+        bench_xtream(args.entries, args.out)
+    elif args.command == "xtream-server":
+        server = start_xtream_server(args.entries, args.port)
+        print(f"*** Serveur de substitution sur http://127.0.0.1:{server.server_port} "
+              "(UserURL http://127.0.0.1, UserPort :<port>, Ctrl+C pour arrêter).")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif args.command == "compressed":
+        bench_compressed(args.entries, args.out)
+    elif args.command == "cache":
+        bench_cache(args.entries, args.out)
+    elif args.command == "shards":
+        bench_shards(args.entries, args.out, args.counts)
+    elif args.command == "workers":
+        bench_workers(args.entries, args.out)
+    elif args.command == "playlist":
+        generate_playlist(args.path, args.entries, args.seed)
+        print(f"*** {args.entries} entrées écrites dans {args.path}.")
+    elif args.command == "pipeline":
+        report = {
+            "version": code_version(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "output_root": args.out,
+            "results": [bench_pipeline(entries, args.out, args.workers) for entries in args.sizes],
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as json_file:
+                json_file.write(output + "\n")
+            print(f"*** Résultats écrits dans {args.json}.")
+        else:
+            print(output)
+
+if __name__ == "__main__":
+    main()
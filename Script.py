@@ -1,27 +1,123 @@
 import os
 import sys
 import xml.etree.ElementTree as ET
-import requests
 import logging
+import mmap
 import re
+import shutil
+import signal
+import struct
 import configparser
+import cProfile
+import gzip
+import hashlib
+import json
+import sqlite3
+import threading
 import time
+import unicodedata
+from array import array
+from collections import Counter, defaultdict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from telegram import Bot
-from telegram.error import TelegramError
+from functools import lru_cache
+
+# requests, asyncio et multiprocessing sont importés à la demande, seulement si le téléchargement,
+# les notifications ou Shards sont activés : /C, /U et les exécutions sans ces options démarrent plus vite.
 
 ######################################################################################################################
                                     # DEBOGAGE #
 ######################################################################################################################
 
+_error_lock = threading.Lock()
+
 # Fonction pour écrire dans le fichier error.txt
 def log_error(message):
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     error_message = f"[{current_time}] {message}"
     logging.error(error_message)
-    with open("error.txt", "a", encoding='utf-8') as error_file:
+    with _error_lock, open("error.txt", "a", encoding='utf-8') as error_file:
         error_file.write(error_message + "\n")
 
+######################################################################################################################
+                                    # MÉTRIQUES #
+######################################################################################################################
+
+class RunMetrics:
+    """Chronomètres par étape et compteurs d'une exécution, exportés en JSON et au format Prometheus."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.stages = defaultdict(float)
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.stages[name] += seconds
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def timed_iter(self, iterable, name):
+        """Itère sur iterable en ajoutant le temps passé à produire chaque élément à l'étape name."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(name, time.perf_counter() - start)
+                return
+            self.add_time(name, time.perf_counter() - start)
+            yield item
+
+    def as_dict(self):
+        return {
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "duration_seconds": round(time.time() - self.started_at, 4),
+            "stages_seconds": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def as_prometheus(self, prefix="m3u_strm"):
+        lines = [
+            f"# HELP {prefix}_stage_seconds Durée de chaque étape de la dernière exécution.",
+            f"# TYPE {prefix}_stage_seconds gauge",
+        ]
+        lines += [f'{prefix}_stage_seconds{{stage="{name}"}} {seconds:.6f}' for name, seconds in self.stages.items()]
+        for name, value in self.counters.items():
+            lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {value}"]
+        lines += [
+            f"# TYPE {prefix}_last_run_duration_seconds gauge",
+            f"{prefix}_last_run_duration_seconds {time.time() - self.started_at:.6f}",
+            f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+            f"{prefix}_last_run_timestamp_seconds {self.started_at:.0f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path=None, prometheus_path=None):
+        for path, content in ((json_path, lambda: json.dumps(self.as_dict(), indent=2, ensure_ascii=False)),
+                              (prometheus_path, self.as_prometheus)):
+            if not path:
+                continue
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                atomic_write_text(path, content())
+            except OSError as e:
+                log_error(f"*** Erreur lors de l'écriture des métriques {path} : {e}")
+
 ######################################################################################################################
                                     # Fonction Main
 ######################################################################################################################
@@ -54,6 +150,8 @@ def main():
     except Exception as e:
         log_error(f"*** Erreur lors du chargement de la configuration : {e}")
         return
+    if config is None:
+        return
 
     # Vérification des arguments fournis pour d'autres commandes
     if len(sys.argv) > 1 and sys.argv[1] == "/U":
@@ -65,13 +163,13 @@ def main():
             print("*** Le fichier 'unwantedgroup.cfg' existant a été renommé en 'unwantedgroup.old'.")
 
         try:
-            retrieve_groups_from_m3u(config["m3u8File"])
+            retrieve_groups_from_m3u(config.m3u8_file)
         except Exception as e:
             log_error(f"*** Erreur lors de la récupération des groupes : {e}")
         return
 
     # Exécution par défaut
-    if config.get("DownloadM3U8Enabled"):
+    if config.download_enabled:
         try:
             download_m3u(config)
         except Exception as e:
@@ -80,9 +178,9 @@ def main():
         print("*** Téléchargement désactivé dans la configuration... On traite le fichier existant...")
 
     # Traitement du fichier M3U après le téléchargement (ou s'il est désactivé)
-    m3u_file_path = config.get("m3u8File")
+    m3u_file_path = config.m3u8_file
     try:
-        process_m3u_file(m3u_file_path)
+        check_m3u_file(m3u_file_path)
     except Exception as e:
         log_error(f"*** Erreur lors du traitement du fichier M3U... {e}")
 
@@ -104,16 +202,72 @@ def create_default_config(config_path):
         <add key="OutDirectory" value="{current_directory}" />
         <add key="m3u8File" value="{os.path.join(current_directory, 'original.m3u8')}" />
 
+        <!-- Sources multiples (URL ou fichier local) séparées par ';', de la plus prioritaire à la moins
+             prioritaire. Vide = m3u8File seul (téléchargé depuis UserURL si DownloadM3U8Enabled) -->
+        <add key="Sources" value="" />
+
         <!-- Renommage des dossiers -->
         <add key="TVSubDir" value="TV" />
 
         <!-- Suppression des préfixes-->
         <add key="PrefixDel" value="FR - ,UK - ,DE - ,ES - " />
 
+        <!-- Manifeste des fichiers générés (synchronisation incrémentale) -->
+        <add key="ManifestFile" value="{os.path.join(current_directory, 'manifest.db')}" />
+
+        <!-- Suppression des fichiers retirés de la playlist -->
+        <add key="PruneEnabled" value="False" />
+        <add key="PruneDryRun" value="False" />
+        <add key="PruneMaxPercent" value="10" />
+
+        <!-- Nombre de threads d'écriture des fichiers .strm (1 = séquentiel) -->
+        <add key="Workers" value="4" />
+
+        <!-- Nombre de processus pour le filtre et le nommage des très grosses playlists (1 = désactivé) -->
+        <add key="Shards" value="1" />
+
+        <!-- Cache binaire de la playlist analysée (<playlist>.cache), invalidé dès que la playlist change -->
+        <add key="ParseCache" value="True" />
+
+        <!-- Séries : dossiers Série/Season NN et fichier tvshow.nfo par série -->
+        <add key="SeasonFolders" value="False" />
+        <add key="SeriesNfo" value="False" />
+
+        <!-- Doublons entre groupes (OTHERS) : un seul fichier par titre, qualités préférées dans l'ordre -->
+        <add key="DedupEnabled" value="False" />
+        <add key="DedupQuality" value="{DEDUP_QUALITY_DEFAULT}" />
+
+        <!-- Point de reprise d'une génération interrompue, enregistré toutes les N secondes (0 = désactivé) -->
+        <add key="CheckpointInterval" value="30" />
+
+        <!-- Mode surveillance (/WATCH) : intervalle entre deux rafraîchissements, en secondes -->
+        <add key="WatchInterval" value="3600" />
+
+        <!-- Métriques de chaque exécution (JSON et format textfile Prometheus, vide = désactivé) -->
+        <add key="MetricsFile" value="{os.path.join(current_directory, 'log', 'metrics.json')}" />
+        <add key="MetricsPromFile" value="{os.path.join(current_directory, 'log', 'metrics.prom')}" />
+        <add key="ProfileEnabled" value="False" />
+
+        <!-- Rotation du dossier log : compression gzip après N jours, suppression des archives après N jours (0 = désactivé) -->
+        <add key="LogCompressDays" value="0" />
+        <add key="LogRetentionDays" value="0" />
+
         <!-- Telegram Bot-->
         <add key="TelegramBotEnabled" value="False" />
         <add key="TelegramBotToken" value="YOUR_TELEGRAM_BOT_TOKEN" />
         <add key="TelegramChatID" value="YOUR_TELEGRAM_CHAT_ID" />
+        <add key="TelegramApiURL" value="{TELEGRAM_API_URL}" />
+
+        <!-- Webhooks (vide = désactivé) -->
+        <add key="DiscordWebhookURL" value="" />
+        <add key="WebhookURL" value="" />
+
+        <!-- Envoi des notifications : délai par requête (secondes), nouvelles tentatives, délai global
+             (secondes, 0 = automatique), détail des nouveautés par groupe -->
+        <add key="NotifyTimeout" value="10" />
+        <add key="NotifyRetries" value="2" />
+        <add key="NotifyDeadline" value="0" />
+        <add key="NotifyDigest" value="False" />
 
         <!-- Téléchargement du fichier m3u -->
         <add key="DownloadM3U8Enabled" value="False" />
@@ -121,6 +275,13 @@ def create_default_config(config_path):
         <add key="UserPort" value="" />
         <add key="UserName" value="" />
         <add key="UserPass" value="" />
+        <add key="DownloadTimeout" value="60" />
+        <add key="DownloadRetries" value="3" />
+        <!-- API Xtream Codes (player_api.php) au lieu de get.php : seules les catégories voulues sont téléchargées -->
+        <add key="XtreamApiEnabled" value="False" />
+        <add key="XtreamWorkers" value="8" />
+        <!-- Enregistrer la playlist téléchargée compressée en gzip (lue décompressée à la volée) -->
+        <add key="DownloadCompressed" value="False" />
     </appSettings>
 </configuration>"""
 
@@ -148,14 +309,72 @@ def create_default_config(config_path):
                                    # CHARGEMENT DU FICHIER CONFIG
 ######################################################################################################################
 
-def load_config(config_file):
-    """Chargement du fichier Config.cfg."""
-    config = {}
+@dataclass(frozen=True)
+class RunContext:
+    """Contexte d'exécution immuable : Config.cfg est lu et validé une seule fois au démarrage."""
+    base_directory: str
+    out_directory: str
+    m3u8_file: str
+    sources: tuple
+    tv_sub_dir: str
+    prefix_del: tuple
+    manifest_file: str
+    prune_enabled: bool
+    prune_dry_run: bool
+    prune_max_percent: float
+    workers: int
+    download_timeout: float
+    download_retries: int
+    download_compressed: bool
+    xtream_api_enabled: bool
+    xtream_workers: int
+    metrics_file: str
+    metrics_prom_file: str
+    profile_enabled: bool
+    log_compress_days: float
+    log_retention_days: float
+    shards: int
+    parse_cache: bool
+    season_folders: bool
+    series_nfo: bool
+    dedup_enabled: bool
+    dedup_quality: tuple
+    watch_interval: float
+    checkpoint_interval: float
+    download_enabled: bool
+    user_url: str
+    user_port: str
+    user_name: str
+    user_pass: str
+    telegram_enabled: bool
+    telegram_token: str
+    telegram_chat_id: str
+    telegram_api_url: str
+    discord_webhook_url: str
+    webhook_url: str
+    notify_timeout: float
+    notify_retries: int
+    notify_deadline: float
+    notify_digest: bool
+
+def parse_prefixes(value):
+    """Découpe la valeur PrefixDel en tuple de préfixes (les valeurs vides sont ignorées)."""
+    return tuple(prefix.strip() for prefix in (value or "").split(',') if prefix.strip())
+
+def parse_quality_preference(value):
+    """Découpe la valeur DedupQuality en tuple de balises, de la plus à la moins préférée."""
+    return tuple(tag.strip().upper() for tag in value.split(',') if tag.strip())
+
+def parse_sources(value):
+    """Découpe la valeur Sources en tuple d'URL ou de chemins, dans l'ordre de priorité."""
+    return tuple(source.strip() for source in (value or "").split(';') if source.strip())
 
+def load_config(config_file):
+    """Chargement du fichier Config.cfg dans un RunContext (None en cas d'erreur)."""
     # Vérification si le fichier existe
     if not os.path.exists(config_file):
         log_error(f"*** Le fichier de configuration {config_file} n'existe pas.")
-        return config  # Retourne un dictionnaire vide si le fichier n'existe pas
+        return None
 
     # Parse le fichier XML
     try:
@@ -163,128 +382,869 @@ def load_config(config_file):
         root = tree.getroot()
 
         # Parcours des éléments XML pour extraire les valeurs
+        config = {}
         for elem in root.findall('.//add'):
-            key = elem.get('key')
-            value = elem.get('value')
-            config[key] = value
-
-        # Retourne le dictionnaire avec les clés attendues
-        return {
-            "UserURL": config.get("UserURL"),
-            "UserPort": config.get("UserPort"),
-            "UserName": config.get("UserName"),
-            "UserPass": config.get("UserPass"),
-            "m3u8File": config.get("m3u8File"),
-            "DownloadM3U8Enabled": config.get("DownloadM3U8Enabled") == "True",
-            "TelegramBotEnabled": config.get("TelegramBotEnabled") == "True",
-            "TelegramBotToken": config.get("TelegramBotToken"),
-            "TelegramChatID": config.get("TelegramChatID")
-        }
+            config[elem.get('key')] = elem.get('value')
+
+        # Validation des clés indispensables au traitement
+        for key in ("OutDirectory", "m3u8File"):
+            if not config.get(key):
+                raise ValueError(f"la clé '{key}' est vide ou introuvable")
+
+        base_directory = config.get("BaseDirectory") or os.getcwd()
+        return RunContext(
+            base_directory=base_directory,
+            out_directory=config["OutDirectory"],
+            m3u8_file=config["m3u8File"],
+            sources=parse_sources(config.get("Sources")),
+            tv_sub_dir=config.get("TVSubDir") or "TV",
+            prefix_del=parse_prefixes(config.get("PrefixDel")),
+            manifest_file=config.get("ManifestFile") or os.path.join(base_directory, "manifest.db"),
+            prune_enabled=config.get("PruneEnabled") == "True",
+            prune_dry_run=config.get("PruneDryRun") == "True",
+            prune_max_percent=float(config.get("PruneMaxPercent") or 10),
+            workers=max(1, int(config.get("Workers") or 1)),
+            download_timeout=float(config.get("DownloadTimeout") or 60),
+            download_retries=int(config.get("DownloadRetries") or 3),
+            download_compressed=config.get("DownloadCompressed") == "True",
+            xtream_api_enabled=config.get("XtreamApiEnabled") == "True",
+            xtream_workers=max(1, int(config.get("XtreamWorkers") or 8)),
+            metrics_file=config.get("MetricsFile", os.path.join("log", "metrics.json")),
+            metrics_prom_file=config.get("MetricsPromFile", os.path.join("log", "metrics.prom")),
+            profile_enabled=config.get("ProfileEnabled") == "True",
+            log_compress_days=float(config.get("LogCompressDays") or 0),
+            log_retention_days=float(config.get("LogRetentionDays") or 0),
+            shards=max(1, int(config.get("Shards") or 1)),
+            parse_cache=config.get("ParseCache") == "True",
+            season_folders=config.get("SeasonFolders") == "True",
+            series_nfo=config.get("SeriesNfo") == "True",
+            dedup_enabled=config.get("DedupEnabled") == "True",
+            dedup_quality=parse_quality_preference(config.get("DedupQuality") or DEDUP_QUALITY_DEFAULT),
+            watch_interval=max(1.0, float(config.get("WatchInterval") or 3600)),
+            checkpoint_interval=float(config.get("CheckpointInterval") or 0),
+            download_enabled=config.get("DownloadM3U8Enabled") == "True",
+            user_url=config.get("UserURL") or "",
+            user_port=config.get("UserPort") or "",
+            user_name=config.get("UserName") or "",
+            user_pass=config.get("UserPass") or "",
+            telegram_enabled=config.get("TelegramBotEnabled") == "True",
+            telegram_token=config.get("TelegramBotToken") or "",
+            telegram_chat_id=config.get("TelegramChatID") or "",
+            telegram_api_url=config.get("TelegramApiURL") or TELEGRAM_API_URL,
+            discord_webhook_url=config.get("DiscordWebhookURL") or "",
+            webhook_url=config.get("WebhookURL") or "",
+            notify_timeout=float(config.get("NotifyTimeout") or 10),
+            notify_retries=int(config.get("NotifyRetries") or 2),
+            notify_deadline=float(config.get("NotifyDeadline") or 0),
+            notify_digest=config.get("NotifyDigest") == "True",
+        )
     except ET.ParseError as e:
         log_error(f"*** Erreur lors du parsing du fichier de configuration : {e}")
-        return config
+        return None
     except Exception as e:
         log_error(f"*** Erreur lors du chargement du fichier de configuration : {e}")
-        return config
+        return None
 
 ######################################################################################################################
                                    # Télécharger le fichier M3U
 ######################################################################################################################
 
-def download_m3u(config):
-    user_url = config.get("UserURL")
-    user_port = config.get("UserPort")
-    username = config.get("UserName")
-    password = config.get("UserPass")
-    m3u_url = f"{user_url}{user_port}/get.php?username={username}&password={password}&type=m3u_plus&output=ts"
+# Résultat du téléchargement de la playlist
+DOWNLOAD_UPDATED = "updated"
+DOWNLOAD_UNCHANGED = "unchanged"
+DOWNLOAD_FAILED = "failed"
 
-    print("*** Téléchargement du fichier M3U en cours ...")
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_COMPRESS_LEVEL = 6  # Niveau gzip des playlists enregistrées compressées (DownloadCompressed)
+
+def playlist_url(config):
+    user_url = config.user_url
+    user_port = config.user_port
+    username = config.user_name
+    password = config.user_pass
+    return f"{user_url}{user_port}/get.php?username={username}&password={password}&type=m3u_plus&output=ts"
+
+def download_meta_path(file_path):
+    """Fichier des métadonnées HTTP (ETag, Last-Modified, empreinte) rangé à côté de la playlist."""
+    return f"{file_path}.meta.json"
+
+def load_download_meta(file_path):
     try:
-        response = requests.get(m3u_url)
-        if response.status_code == 200:
-            with open(config["m3u8File"], "wb") as file:
-                file.write(response.content)
-            print("*** Téléchargement du fichier M3U réussi.")
-        else:
-            error_message = f"*** Erreur de téléchargement : {response.status_code} - {response.text}"
+        with open(download_meta_path(file_path), 'r', encoding='utf-8') as meta_file:
+            return json.load(meta_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_download_meta(file_path, meta):
+    atomic_write_text(download_meta_path(file_path), json.dumps(meta, indent=2))
+
+def hash_file(path, digest=None):
+    """Ajoute le contenu du fichier à digest (sha256 par défaut), lu par blocs."""
+    digest = digest or hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest
+
+def fetch_playlist(url, file_path, timeout=60, retries=3, compress=False):
+    """Télécharge la playlist en flux dans un fichier .part puis remplace file_path de façon atomique.
+
+    Les requêtes sont conditionnelles (If-None-Match / If-Modified-Since) et un téléchargement
+    interrompu reprend là où il s'est arrêté (Range / If-Range). Renvoie DOWNLOAD_UPDATED,
+    DOWNLOAD_UNCHANGED (304 ou contenu identique) ou DOWNLOAD_FAILED.
+
+    Avec compress, la playlist est enregistrée compressée en gzip au fil du téléchargement
+    (sans reprise : les positions Range portent sur le contenu décompressé). L'empreinte sha256
+    reste celle du contenu décompressé.
+    """
+    import requests  # Import différé : inutile si le téléchargement est désactivé
+
+    meta = load_download_meta(file_path)
+    part_path = f"{file_path}.part"
+
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(min(2 ** attempt, 30))  # Attente exponentielle entre deux tentatives
+            print(f"*** Nouvelle tentative de téléchargement ({attempt}/{retries})...")
+
+        headers = {}
+        resume_from = os.path.getsize(part_path) if os.path.exists(part_path) and not compress else 0
+        if resume_from and meta.get("part_validator"):
+            # Reprise : les octets demandés sont ceux du contenu décompressé
+            headers["Range"] = f"bytes={resume_from}-"
+            headers["If-Range"] = meta["part_validator"]
+            headers["Accept-Encoding"] = "identity"
+        elif os.path.exists(file_path):
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 304:
+                    return DOWNLOAD_UNCHANGED
+
+                if response.status_code == 416 and "Range" in headers:
+                    # Rien après resume_from : le .part est complet (arrêt avant le remplacement) si sa
+                    # taille est celle annoncée par Content-Range (bytes */N), sinon il est inutilisable
+                    total_size = response.headers.get("Content-Range", "").rpartition("/")[2]
+                    if total_size != str(resume_from):
+                        print("*** Téléchargement partiel inutilisable : nouveau téléchargement complet.")
+                        os.remove(part_path)
+                        meta.pop("part_validator", None)
+                        save_download_meta(file_path, meta)
+                        return fetch_playlist(url, file_path, timeout, retries - attempt, compress)
+                    # Sans en-têtes dans la 416, le validateur du .part (ETag entre guillemets ou date) est conservé
+                    validator = meta["part_validator"]
+                    is_etag = validator.startswith(('"', 'W/'))
+                    etag = response.headers.get("ETag") or (validator if is_etag else None)
+                    last_modified = response.headers.get("Last-Modified") or (None if is_etag else validator)
+                    digest = hash_file(part_path)
+
+                elif response.status_code not in (200, 206):
+                    error_message = f"*** Erreur de téléchargement : {response.status_code} - {response.reason}"
+                    print(error_message)
+                    log_error(error_message)
+                    if response.status_code < 500:
+                        return DOWNLOAD_FAILED  # Inutile de réessayer une erreur client
+                    continue
+
+                else:
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+
+                    # Mémoriser le validateur pour pouvoir reprendre ce téléchargement plus tard
+                    meta["part_validator"] = etag or last_modified
+                    save_download_meta(file_path, meta)
+
+                    digest = hashlib.sha256()
+                    if response.status_code == 206:
+                        hash_file(part_path, digest)
+                        mode = 'ab'
+                    else:
+                        mode = 'wb'
+
+                    # iter_content décompresse le transfert gzip à la volée
+                    if compress:
+                        part_file = gzip.open(part_path, 'wb', compresslevel=DOWNLOAD_COMPRESS_LEVEL)
+                    else:
+                        part_file = open(part_path, mode)
+                    with part_file:
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            part_file.write(chunk)
+                            digest.update(chunk)
+
+        except (requests.RequestException, OSError) as e:
+            error_message = f"*** Erreur de requête : {str(e)}"
             print(error_message)
             log_error(error_message)
-    except requests.RequestException as e:
-        error_message = f"*** Erreur de requête : {str(e)}"
-        print(error_message)
-        log_error(error_message)
+            continue
+
+        sha256 = digest.hexdigest()
+        unchanged = sha256 == meta.get("sha256") and os.path.exists(file_path)
+        if unchanged:
+            os.remove(part_path)  # Conserver l'ancien fichier et sa date de modification
+        else:
+            os.replace(part_path, file_path)
+
+        meta.pop("part_validator", None)
+        meta.update(etag=etag, last_modified=last_modified, sha256=sha256)
+        save_download_meta(file_path, meta)
+        return DOWNLOAD_UNCHANGED if unchanged else DOWNLOAD_UPDATED
+
+    return DOWNLOAD_FAILED
+
+def is_url(location):
+    return location.startswith(("http://", "https://"))
+
+def source_files(config):
+    """Fichiers playlist locaux à traiter, du plus prioritaire au moins prioritaire.
+
+    Sans Sources, seul m3u8File est traité. Une source URL est téléchargée à côté de m3u8File
+    (original.source1.m3u8, original.source2.m3u8...).
+    """
+    if not config.sources:
+        return [config.m3u8_file]
+    base, extension = os.path.splitext(config.m3u8_file)
+    return [f"{base}.source{index}{extension or '.m3u8'}" if is_url(location) else location
+            for index, location in enumerate(config.sources, 1)]
+
+def download_sources(config):
+    """Télécharge en parallèle les sources URL ; DOWNLOAD_UNCHANGED seulement si aucune n'a changé."""
+    jobs = [(location, file_path) for location, file_path in zip(config.sources, source_files(config))
+            if is_url(location)]
+    if not jobs:
+        return DOWNLOAD_UNCHANGED
+
+    print(f"*** Téléchargement de {len(jobs)} sources en cours ...")
+
+    def fetch(job):
+        return fetch_playlist(job[0], job[1], timeout=config.download_timeout, retries=config.download_retries,
+                              compress=config.download_compressed)
+
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        statuses = list(executor.map(fetch, jobs))
+
+    for (_, file_path), status in zip(jobs, statuses):
+        print(f"*** {os.path.basename(file_path)} : {status}")
+    if all(status == DOWNLOAD_FAILED for status in statuses):
+        return DOWNLOAD_FAILED
+    return DOWNLOAD_UPDATED if DOWNLOAD_UPDATED in statuses else DOWNLOAD_UNCHANGED
+
+def download_m3u(config, group_filter=None):
+    if config.sources:
+        return download_sources(config)
+
+    if config.xtream_api_enabled:
+        print("*** Téléchargement par l'API Xtream Codes en cours ...")
+        status = fetch_xtream(config, config.m3u8_file, group_filter)
+        print(f"*** API Xtream : {status}")
+        return status
+
+    print("*** Téléchargement du fichier M3U en cours ...")
+    status = fetch_playlist(playlist_url(config), config.m3u8_file,
+                            timeout=config.download_timeout, retries=config.download_retries,
+                            compress=config.download_compressed)
+    if status == DOWNLOAD_UPDATED:
+        print("*** Téléchargement du fichier M3U réussi.")
+    elif status == DOWNLOAD_UNCHANGED:
+        print("*** Le fichier M3U n'a pas changé depuis le dernier téléchargement.")
+    return status
 
 ######################################################################################################################
-                                   # Traitement le fichier M3U
+                                   # Source Xtream Codes (player_api.php)
 ######################################################################################################################
 
-def process_m3u_file(file_path):
-    if file_path is None:
-        error_message = "*** Le chemin du fichier M3U n'est pas défini dans la configuration."
+# (type d'URL, action des catégories, action des flux) ; les séries passent en plus par get_series_info
+XTREAM_LIVE = ("live", "get_live_categories", "get_live_streams")
+XTREAM_MOVIE = ("movie", "get_vod_categories", "get_vod_streams")
+XTREAM_SERIES = ("series", "get_series_categories", "get_series")
+XTREAM_KINDS = (XTREAM_LIVE, XTREAM_MOVIE, XTREAM_SERIES)
+
+class XtreamClient:
+    """Client de l'API player_api.php d'un serveur Xtream Codes (UserURL, UserPort, UserName, UserPass).
+
+    Une seule session requests est partagée par les threads : son pool garde xtream_workers
+    connexions ouvertes et les erreurs réseau ou 5xx sont réessayées DownloadRetries fois.
+    """
+
+    def __init__(self, config):
+        import requests  # Import différé : inutile si le téléchargement est désactivé
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.base_url = f"{config.user_url}{config.user_port}"
+        self.user_name = config.user_name
+        self.user_pass = config.user_pass
+        self.timeout = config.download_timeout
+        self.session = requests.Session()
+        retry = Retry(total=config.download_retries, backoff_factor=1, status_forcelist=(500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.xtream_workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, action, **params):
+        """Réponse JSON d'une action ; les serveurs renvoient parfois null ou {} pour une liste vide."""
+        params.update(username=self.user_name, password=self.user_pass, action=action)
+        response = self.session.get(f"{self.base_url}/player_api.php", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json() or []
+
+    def stream_url(self, kind, stream_id, extension):
+        return f"{self.base_url}/{kind}/{self.user_name}/{self.user_pass}/{stream_id}.{extension}"
+
+    def close(self):
+        self.session.close()
+
+def xtream_entries(client, kind, category_name, streams):
+    """M3UEntry des flux d'une catégorie live ou movie, comme dans une playlist m3u_plus."""
+    for stream in streams:
+        name = stream.get("name") or "Unknown"
+        extension = "ts" if kind == XTREAM_LIVE[0] else stream.get("container_extension") or "mp4"
+        yield M3UEntry(
+            tvg_id=stream.get("epg_channel_id") or "",
+            tvg_name=name,
+            tvg_logo=stream.get("stream_icon") or "",
+            group_title=category_name,
+            display_name=name,
+            url=client.stream_url(kind, stream["stream_id"], extension),
+        )
+
+def xtream_episode_entries(client, category_name, series, info):
+    """M3UEntry des épisodes d'une série (get_series_info), nommés « Série S01 E01 »."""
+    series_name = series.get("name") or "Unknown"
+    episodes = (info.get("episodes") or {}) if isinstance(info, dict) else {}
+    if isinstance(episodes, list):  # Certains serveurs renvoient une liste de saisons
+        episodes = {str(index): season for index, season in enumerate(episodes, 1)}
+    for season in sorted(episodes, key=lambda value: int(value) if str(value).isdigit() else 0):
+        for episode in episodes[season] or []:
+            name = f"{series_name} S{int(episode.get('season') or season):02d} E{int(episode.get('episode_num') or 0):02d}"
+            yield M3UEntry(
+                tvg_id="",
+                tvg_name=name,
+                tvg_logo=series.get("cover") or "",
+                group_title=category_name,
+                display_name=name,
+                url=client.stream_url(XTREAM_SERIES[0], episode["id"], episode.get("container_extension") or "mp4"),
+            )
+
+def m3u_attribute(value):
+    """Valeur d'attribut #EXTINF : sans guillemets ni sauts de ligne (voir _EXTINF_ATTR_RE)."""
+    return " ".join(str(value).replace('"', "'").split())
+
+def format_extinf(entry):
+    return (f'#EXTINF:-1 tvg-id="{m3u_attribute(entry.tvg_id)}" tvg-name="{m3u_attribute(entry.tvg_name)}" '
+            f'tvg-logo="{m3u_attribute(entry.tvg_logo)}" group-title="{m3u_attribute(entry.group_title)}",'
+            f'{" ".join(entry.display_name.split())}\n{entry.url}\n')
+
+def xtream_categories(client, executor):
+    """[(type, action des flux, catégories)] des trois listes de catégories, demandées en parallèle."""
+    category_lists = executor.map(lambda kind: client.get(kind[1]), XTREAM_KINDS)
+    return [(kind, streams_action, categories)
+            for (kind, _, streams_action), categories in zip(XTREAM_KINDS, category_lists)]
+
+def iter_xtream_entries(client, executor, group_filter=None, max_pending=32):
+    """Entrées des catégories voulues, dans l'ordre du serveur (live, films, séries).
+
+    Les catégories rejetées par unwantedgroup.cfg sont écartées avant la demande de leurs flux :
+    elles ne coûtent ni bande passante ni analyse.
+    """
+    wanted = []
+    skipped = 0
+    for kind, streams_action, categories in xtream_categories(client, executor):
+        for category in categories:
+            category_name = (category.get("category_name") or "").strip()
+            if group_filter is not None and group_filter.classify(category_name) is None:
+                skipped += 1
+                continue
+            wanted.append((kind, streams_action, category.get("category_id"), category_name))
+    if group_filter is not None:
+        print(f"*** API Xtream : {len(wanted)} catégories à télécharger, {skipped} ignorées (unwantedgroup.cfg).")
+
+    def fetch_streams(category):
+        kind, streams_action, category_id, _ = category
+        return client.get(streams_action, category_id=category_id)
+
+    def fetch_series_info(series):
+        return client.get("get_series_info", series_id=series["series_id"])
+
+    for (kind, _, _, category_name), streams in zip(wanted, run_bounded(executor, fetch_streams, wanted, max_pending)):
+        if kind != XTREAM_SERIES[0]:
+            yield from xtream_entries(client, kind, category_name, streams)
+            continue
+        # Séries : un appel get_series_info par série, au plus max_pending en attente
+        infos = run_bounded(executor, fetch_series_info, streams, max_pending)
+        for series, info in zip(streams, infos):
+            yield from xtream_episode_entries(client, category_name, series, info)
+
+def fetch_xtream(config, file_path, group_filter=None):
+    """Construit la playlist m3u_plus des catégories voulues à partir de player_api.php.
+
+    Le résultat est écrit dans file_path comme un téléchargement get.php (fichier .part,
+    empreinte sha256, DownloadCompressed) : la suite du traitement est identique. Renvoie
+    DOWNLOAD_UPDATED, DOWNLOAD_UNCHANGED ou DOWNLOAD_FAILED.
+    """
+    import requests  # Import différé : inutile si le téléchargement est désactivé
+
+    meta = load_download_meta(file_path)
+    part_path = f"{file_path}.part"
+    client = XtreamClient(config)
+    digest = hashlib.sha256()
+    total_entries = 0
+    try:
+        with ThreadPoolExecutor(max_workers=config.xtream_workers) as executor:
+            if config.download_compressed:
+                part_file = gzip.open(part_path, 'wb', compresslevel=DOWNLOAD_COMPRESS_LEVEL)
+            else:
+                part_file = open(part_path, 'wb')
+            with part_file:
+                part_file.write(b"#EXTM3U\n")
+                digest.update(b"#EXTM3U\n")
+                for entry in iter_xtream_entries(client, executor, group_filter, config.xtream_workers * 4):
+                    data = format_extinf(entry).encode('utf-8')
+                    part_file.write(data)
+                    digest.update(data)
+                    total_entries += 1
+    except (requests.RequestException, ValueError, KeyError, TypeError, AttributeError, OSError) as e:
+        # Playlist incomplète : l'ancienne est conservée
+        error_message = f"*** Erreur de l'API Xtream : {str(e)}"
         print(error_message)
         log_error(error_message)
-        return
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return DOWNLOAD_FAILED
+    finally:
+        client.close()
+
+    print(f"*** API Xtream : {total_entries} entrées reçues.")
+    sha256 = digest.hexdigest()
+    unchanged = sha256 == meta.get("sha256") and os.path.exists(file_path)
+    if unchanged:
+        os.remove(part_path)  # Conserver l'ancien fichier et sa date de modification
+    else:
+        os.replace(part_path, file_path)
+    meta.update(source="xtream", sha256=sha256)
+    save_download_meta(file_path, meta)
+    return DOWNLOAD_UNCHANGED if unchanged else DOWNLOAD_UPDATED
+
+def xtream_group_counts(config):
+    """Catégories du serveur (/U) : les flux ne sont pas téléchargés, le nombre d'entrées reste inconnu (0)."""
+    client = XtreamClient(config)
+    try:
+        with ThreadPoolExecutor(max_workers=len(XTREAM_KINDS)) as executor:
+            return Counter({(category.get("category_name") or "").strip(): 0
+                            for _, _, categories in xtream_categories(client, executor)
+                            for category in categories})
+    finally:
+        client.close()
+
+def generation_key(config, input_files):
+    """Identifie une génération : empreinte des playlists et dates de modification des fichiers de réglages."""
+    playlists = []
+    for file_path in source_files(config):
+        sha256 = load_download_meta(file_path).get("sha256")
+        if sha256:
+            playlists.append(sha256)
+        elif config.sources and os.path.exists(file_path):
+            playlists.append(str(os.path.getmtime(file_path)))  # Source locale : date de modification
+        else:
+            return None
+    mtimes = [str(os.path.getmtime(path)) if os.path.exists(path) else "-" for path in input_files]
+    return "|".join(playlists + [config.out_directory] + mtimes)
+
+def generation_is_current(config, input_files):
+    key = generation_key(config, input_files)
+    return key is not None and load_download_meta(config.m3u8_file).get("generated") == key
+
+def mark_generation_done(config, input_files):
+    key = generation_key(config, input_files)
+    if key is not None:
+        meta = load_download_meta(config.m3u8_file)
+        meta["generated"] = key
+        save_download_meta(config.m3u8_file, meta)
+
+######################################################################################################################
+                                   # Lecture du fichier M3U
+######################################################################################################################
+
+# Entrée du fichier M3U (tuple compact, un par #EXTINF)
+M3UEntry = namedtuple("M3UEntry", ("tvg_id", "tvg_name", "tvg_logo", "group_title", "display_name", "url"))
+
+# Un seul motif compilé pour tous les attributs clé="valeur" d'une ligne #EXTINF
+_EXTINF_ATTR_RE = re.compile(r'([\w-]+)="([^"]*)"')
+
+def parse_extinf(line, url, default_group="Unknown"):
+    """Construit une M3UEntry à partir d'une ligne #EXTINF et de son lien."""
+    attributes = {}
+    attributes_end = 0
+    for match in _EXTINF_ATTR_RE.finditer(line):
+        attributes[match.group(1)] = match.group(2)
+        attributes_end = match.end()
+
+    # Le nom affiché suit la première virgule après les attributs
+    comma = line.find(',', attributes_end)
+    display_name = line[comma + 1:].strip() if comma != -1 else ""
+
+    return M3UEntry(
+        tvg_id=attributes.get("tvg-id", ""),
+        tvg_name=attributes.get("tvg-name", "Unknown"),
+        tvg_logo=attributes.get("tvg-logo", ""),
+        group_title=attributes.get("group-title", default_group),
+        display_name=display_name,
+        url=url,
+    )
+
+# Signatures des playlists compressées (décompressées à la volée, sans fichier temporaire)
+COMPRESSION_MAGIC = ((b"\x1f\x8b", "gzip"), (b"\xfd7zXZ\x00", "xz"), (b"\x28\xb5\x2f\xfd", "zstd"))
+
+def playlist_compression(file_path):
+    """Renvoie "gzip", "xz", "zstd" d'après les premiers octets du fichier, ou None s'il n'est pas compressé."""
+    with open(file_path, 'rb') as file:
+        head = file.read(6)
+    for magic, compression in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+def open_playlist(file_path):
+    """Ouvre la playlist en texte UTF-8, décompressée à la volée si elle est compressée (gzip, xz ou zstd)."""
+    compression = playlist_compression(file_path)
+    if compression is None:
+        return open(file_path, 'r', encoding='utf-8')
+    if compression == "gzip":
+        return gzip.open(file_path, 'rt', encoding='utf-8')
+    if compression == "xz":
+        import lzma  # Import différé : playlists xz uniquement
+        return lzma.open(file_path, 'rt', encoding='utf-8')
+
+    # zstd : module standard depuis Python 3.14, sinon le paquet zstandard
+    try:
+        from compression import zstd
+        return zstd.open(file_path, 'rt', encoding='utf-8')
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError(f"la playlist {file_path} est compressée en zstd : installer le module zstandard "
+                           "(pip install zstandard)") from None
+    import io
+    raw = open(file_path, 'rb')
+    reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+    return io.TextIOWrapper(reader, encoding='utf-8')
+
+def iter_m3u_entries(file_path):
+    """Lit le fichier M3U ligne par ligne (mémoire constante) et génère une M3UEntry par entrée.
+
+    Les lignes vides et les directives (#EXTVLCOPT, #KODIPROP...) entre le #EXTINF et le lien
+    sont ignorées ; #EXTGRP sert de group-title si l'attribut est absent. Une playlist compressée
+    est décompressée au fil de la lecture (voir open_playlist).
+    """
+    with open_playlist(file_path) as m3u8:
+        extinf = None
+        extgrp = "Unknown"
+        for line in m3u8:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#EXTINF"):
+                extinf = line
+                extgrp = "Unknown"
+            elif line.startswith("#EXTGRP:"):
+                extgrp = line[len("#EXTGRP:"):].strip()
+            elif line.startswith("#"):
+                continue
+            elif extinf is not None:
+                yield parse_extinf(extinf, line, extgrp)
+                extinf = None
+
+######################################################################################################################
+                                   # Cache binaire de la playlist analysée
+######################################################################################################################
+
+# Instantané binaire écrit à côté de la playlist : <playlist>.cache
+PLAYLIST_CACHE_SUFFIX = ".cache"
+PLAYLIST_CACHE_MAGIC = b"M3UCACH1"
+# En-tête : signature, taille et date (ns) de la playlist, sha256 du contenu, nombre d'entrées,
+# puis la longueur de chaque bloc (table des groupes, indices de groupe, une colonne par champ texte)
+_CACHE_HEADER = struct.Struct("<8sQQ32sQ")
+# Champs texte rangés en colonnes (group_title est remplacé par un indice dans la table des groupes)
+CACHE_COLUMNS = ("tvg_id", "tvg_name", "tvg_logo", "display_name", "url")
+_CACHE_BLOCKS = struct.Struct(f"<{len(CACHE_COLUMNS) + 2}Q")
+CACHE_CHUNK_SIZE = 1 << 20
+
+class PlaylistCache:
+    """Entrées analysées d'une playlist, rangées en colonnes dans <playlist>.cache.
+
+    Chaque colonne est un bloc UTF-8 (une valeur par ligne) ; les group-title distincts forment une
+    table et chaque entrée n'en garde que l'indice (array 'I'). Le cache reste valide tant que la
+    taille, la date de modification ou, à défaut, l'empreinte sha256 correspondent à la playlist.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.cache_path = file_path + PLAYLIST_CACHE_SUFFIX
+
+    def read_header(self):
+        """(taille, date, sha256, nombre d'entrées, longueurs des blocs) ou None si le cache est illisible."""
+        try:
+            with open(self.cache_path, 'rb') as file:
+                head = file.read(_CACHE_HEADER.size + _CACHE_BLOCKS.size)
+            magic, size, mtime_ns, sha256, count = _CACHE_HEADER.unpack_from(head)
+            blocks = _CACHE_BLOCKS.unpack_from(head, _CACHE_HEADER.size)
+        except (OSError, struct.error):
+            return None
+        if magic != PLAYLIST_CACHE_MAGIC:
+            return None
+        return size, mtime_ns, sha256, count, blocks
+
+    def is_valid(self):
+        header = self.read_header()
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return False
+        if header is None or header[0] != stat.st_size:
+            return False
+        if header[1] == stat.st_mtime_ns:
+            return True
+
+        # Même taille mais date différente (copie, nouveau téléchargement) : comparer le contenu
+        if hash_file(self.file_path).digest() != header[2]:
+            return False
+        with open(self.cache_path, 'r+b') as file:
+            file.write(_CACHE_HEADER.pack(PLAYLIST_CACHE_MAGIC, stat.st_size, stat.st_mtime_ns, header[2], header[3]))
+        return True
+
+    def group_counts(self):
+        """Nombre d'entrées par group-title, lu dans le cache sans décoder les colonnes."""
+        _, _, _, _, blocks = self.read_header()
+        counts = Counter()
+        with open(self.cache_path, 'rb') as file:
+            file.seek(_CACHE_HEADER.size + _CACHE_BLOCKS.size)
+            groups = _split_block(file.read(blocks[0]))
+            indexes = array('I')
+            indexes.frombytes(file.read(blocks[1]))
+        for index, count in Counter(indexes).items():
+            counts[groups[index]] += count
+        return counts
+
+    def iter_entries(self):
+        """Génère les M3UEntry du cache, chaque colonne étant lue par blocs (mémoire bornée)."""
+        _, _, _, count, blocks = self.read_header()
+        offsets = []
+        position = _CACHE_HEADER.size + _CACHE_BLOCKS.size
+        for length in blocks:
+            offsets.append((position, position + length))
+            position += length
+
+        with open(self.cache_path, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                groups = _split_block(data[slice(*offsets[0])])
+                columns = [_iter_block_lines(data, start, end) for start, end in offsets[2:]]
+                for tvg_id, tvg_name, tvg_logo, display_name, url, group in zip(
+                        *columns, _iter_block_indexes(data, *offsets[1])):
+                    yield M3UEntry(tvg_id, tvg_name, tvg_logo, groups[group], display_name, url)
+
+    def write_through(self, entries):
+        """Transmet les entrées analysées tout en les écrivant colonne par colonne dans des fichiers
+        temporaires ; le cache n'est assemblé que si la lecture va jusqu'au bout et que la playlist
+        n'a pas changé pendant l'analyse.
+        """
+        stat = os.stat(self.file_path)
+        temporaries = [f"{self.cache_path}.{name}.tmp" for name in CACHE_COLUMNS]
+        groups = {}
+        indexes = array('I')
+        count = 0
+        files = [open(path, 'w', encoding='utf-8', newline='\n') for path in temporaries]
+        try:
+            for entry in entries:
+                for file, value in zip(files, (entry.tvg_id, entry.tvg_name, entry.tvg_logo,
+                                               entry.display_name, entry.url)):
+                    file.write(value)
+                    file.write("\n")
+                indexes.append(groups.setdefault(entry.group_title, len(groups)))
+                count += 1
+                yield entry
+        except BaseException:
+            # Lecture interrompue (erreur ou appelant qui s'arrête) : cache incomplet, rien n'est écrit
+            for file in files:
+                file.close()
+            _remove_files(temporaries)
+            raise
+        for file in files:
+            file.close()
 
-    if os.path.exists(file_path):
         try:
-            # Ouvrir le fichier avec l'encodage UTF-8
-            with open(file_path, "r", encoding='utf-8') as file:
-                content = file.readlines()
-                # Ajoutez ici le code pour traiter le contenu du fichier
-                print(f"*** Traitement du fichier M3U en cours...")
-                # Processus d'analyse et de filtrage ici
-                # Par exemple, filtrer les chaînes en fonction des groupes non désirés
+            if _same_stat(stat, os.stat(self.file_path)):
+                self.assemble(stat, count, groups, indexes, temporaries)
         except Exception as e:
-            error_message = f"*** Erreur lors de l'ouverture ou du traitement du fichier M3U : {str(e)}"
-            print(error_message)
-            log_error(error_message)
+            log_error(f"*** Impossible d'écrire le cache de la playlist {self.cache_path} : {e}")
+        finally:
+            _remove_files(temporaries)
+
+    def assemble(self, stat, count, groups, indexes, temporaries):
+        sha256 = hash_file(self.file_path).digest()
+        group_block = "".join(f"{group}\n" for group in groups).encode('utf-8')
+        index_block = indexes.tobytes()
+        blocks = [len(group_block), len(index_block)] + [os.path.getsize(path) for path in temporaries]
+
+        temporary = self.cache_path + ".tmp"
+        with open(temporary, 'wb') as cache:
+            cache.write(_CACHE_HEADER.pack(PLAYLIST_CACHE_MAGIC, stat.st_size, stat.st_mtime_ns, sha256, count))
+            cache.write(_CACHE_BLOCKS.pack(*blocks))
+            cache.write(group_block)
+            cache.write(index_block)
+            for path in temporaries:
+                with open(path, 'rb') as column:
+                    shutil.copyfileobj(column, cache, CACHE_CHUNK_SIZE)
+        os.replace(temporary, self.cache_path)
+
+def _same_stat(before, after):
+    return before.st_size == after.st_size and before.st_mtime_ns == after.st_mtime_ns
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _split_block(block):
+    """Valeurs d'un bloc UTF-8 dont chaque valeur se termine par un saut de ligne."""
+    return block.decode('utf-8').split("\n")[:-1] if block else []
+
+def _iter_block_lines(data, start, end):
+    """Valeurs du bloc data[start:end], décodées par tranches d'environ CACHE_CHUNK_SIZE octets."""
+    while start < end:
+        # La tranche s'arrête toujours sur un saut de ligne (fin d'une valeur)
+        stop = data.find(b"\n", min(start + CACHE_CHUNK_SIZE, end - 1), end) + 1
+        yield from _split_block(data[start:stop])
+        start = stop
+
+def _iter_block_indexes(data, start, end):
+    step = CACHE_CHUNK_SIZE - CACHE_CHUNK_SIZE % array('I').itemsize
+    while start < end:
+        indexes = array('I')
+        indexes.frombytes(data[start:min(start + step, end)])
+        yield from indexes
+        start += step
+
+def iter_playlist_entries(file_path, cache=False):
+    """Entrées de la playlist : depuis <playlist>.cache s'il est à jour, sinon analysées (et mises
+    en cache si cache est vrai)."""
+    if not cache:
+        yield from iter_m3u_entries(file_path)
+        return
+    playlist_cache = PlaylistCache(file_path)
+    if playlist_cache.is_valid():
+        yield from playlist_cache.iter_entries()
     else:
-        error_message = f"*** Le fichier M3U spécifié n'existe pas : {file_path}"
-        print(error_message)
-        log_error(error_message)
+        yield from playlist_cache.write_through(iter_m3u_entries(file_path))
 
 ######################################################################################################################
-                                   #Génération du Fichier Unwantedgroup
+                                   # Traitement le fichier M3U
 ######################################################################################################################
 
-def generate_unwanted_group_file(config_file):
-    def get_m3u8_file_path():
-        m3u8_file = None
-        try:
-            with open(config_file, "r", encoding='utf-8') as file:
-                lines = file.readlines()
-                for line in lines:
-                    if '<add key="m3u8File"' in line:
-                        start = line.find('value="') + len('value="')
-                        end = line.find('"', start)
-                        m3u8_file = line[start:end]
-                        break
-        except FileNotFoundError:
-            with open("error.txt", "a", encoding='utf-8') as error_file:
-                error_file.write(f"*** Fichier de configuration non trouvé : {config_file}\n")
-        return m3u8_file
-
-    def retrieve_groups_from_m3u(m3u8_file):
-        if not os.path.exists(m3u8_file):
-            with open("error.txt", "a", encoding='utf-8') as error_file:
-                error_file.write(f"*** Le fichier {m3u8_file} n'existe pas.\n")
-            return
+def iter_source_entries(config):
+    """Enchaîne les entrées de toutes les sources, de la plus prioritaire à la moins prioritaire.
 
-        with open(m3u8_file, "r", encoding='utf-8') as file:
-            lines = file.readlines()
+    Le premier fichier .strm planifié pour un chemin l'emporte (voir plan_strm) : une entrée d'une
+    source moins prioritaire qui produit le même fichier est ignorée.
+    """
+    for file_path in source_files(config):
+        yield from iter_playlist_entries(file_path, config.parse_cache)
 
-        all_groups = set()
-        empty_group_found = False  # Indicateur pour les groupes vides
+def check_m3u_file(file_path):
+    """Vérifie que la playlist est définie et existe (les erreurs sont journalisées) ; renvoie True si elle est lisible."""
+    if file_path is None:
+        error_message = "*** Le chemin du fichier M3U n'est pas défini dans la configuration."
+    elif not os.path.exists(file_path):
+        error_message = f"*** Le fichier M3U spécifié n'existe pas : {file_path}"
+    else:
+        return True
+    print(error_message)
+    log_error(error_message)
+    return False
 
-        for line in lines:
-            if 'group-title="' in line:
-                start = line.find('group-title="') + len('group-title="')
-                end = line.find('"', start)
-                group = line[start:end].strip()
-                if group:
-                    all_groups.add(group)
-                else:
-                    empty_group_found = True  # Marquer qu'un groupe vide a été trouvé
+######################################################################################################################
+                                   #Génération du Fichier Unwantedgroup
+######################################################################################################################
+
+# Séparateur du nombre d'entrées écrit en commentaire après chaque groupe de unwantedgroup.cfg
+GROUP_COUNT_SEPARATOR = "\t# "
+
+def scan_group_counts(m3u8_file, cache=False):
+    """Compte les entrées par group-title en parcourant le fichier projeté en mémoire (mmap).
+
+    Seuls les octets des valeurs de group-title sont décodés, une fois par groupe distinct :
+    la mémoire utilisée ne dépend pas de la taille de la playlist. Avec cache, les compteurs sont
+    lus dans <playlist>.cache, construit au besoin par une analyse complète réutilisée ensuite
+    par la génération.
+    """
+    if playlist_compression(m3u8_file) is not None and not cache:
+        # Playlist compressée : pas de projection en mémoire possible, lecture par le parseur complet
+        return Counter(entry.group_title.strip() for entry in iter_m3u_entries(m3u8_file))
+    if cache:
+        playlist_cache = PlaylistCache(m3u8_file)
+        if playlist_cache.is_valid():
+            counts = Counter()
+            for group, count in playlist_cache.group_counts().items():
+                counts[group.strip()] += count
+            return counts
+        return Counter(entry.group_title.strip()
+                       for entry in playlist_cache.write_through(iter_m3u_entries(m3u8_file)))
+
+    raw_counts = Counter()
+    marker = b'group-title="'
+    with open(m3u8_file, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return Counter()
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data.find(b"#EXTGRP:") != -1:
+                # Groupes déclarés par #EXTGRP : le parseur complet est nécessaire
+                return Counter(entry.group_title.strip() for entry in iter_m3u_entries(m3u8_file))
+
+            total_extinf = 0
+            position = data.find(b"#EXTINF")
+            while position != -1:
+                total_extinf += 1
+                position = data.find(b"#EXTINF", position + 7)
+
+            position = data.find(marker)
+            while position != -1:
+                start = position + len(marker)
+                end = data.find(b'"', start)
+                line_end = data.find(b'\n', start)
+                if end == -1 or (line_end != -1 and line_end < end):
+                    end = line_end if line_end != -1 else len(data)
+                raw_counts[data[start:end]] += 1
+                position = data.find(marker, end)
+
+    counts = Counter()
+    for raw_group, count in raw_counts.items():
+        counts[raw_group.decode('utf-8', errors='replace').strip()] += count
+
+    # Entrées #EXTINF sans group-title : classées dans "Unknown" lors de la génération
+    if total_extinf > sum(raw_counts.values()):
+        counts["Unknown"] += total_extinf - sum(raw_counts.values())
+    return counts
+
+def generate_unwanted_group_file(config):
+    def retrieve_groups_from_m3u(m3u8_files):
+        group_counts = Counter()
+        for m3u8_file in m3u8_files:
+            if not os.path.exists(m3u8_file):
+                with open("error.txt", "a", encoding='utf-8') as error_file:
+                    error_file.write(f"*** Le fichier {m3u8_file} n'existe pas.\n")
+                return
+            group_counts.update(scan_group_counts(m3u8_file, config.parse_cache))
+        write_groups(group_counts)
+
+    def write_groups(group_counts):
+        empty_group_count = group_counts.pop("", 0)  # Entrées dont le group-title est vide
+        all_groups = set(group_counts)
 
         # Classer les groupes selon les sections demandées
         sorted_groups = []
@@ -300,65 +1260,459 @@ def generate_unwanted_group_file(config_file):
         with open("unwantedgroup.cfg", "w", encoding='utf-8') as f:
             f.write("######################################################################################################################\n")
             f.write("DELETE ONLY GROUP YOU WANT TO BE DOWNLOADED AND TRAITED\n")  # Écrire le titre NOGROUP en premier
-            f.write(".NOGROUP-ASSIGNED | The first group assigned, it means they dont have (groupe-title") completed \n")  # Écrire le titre NOGROUP en premier
+            f.write(".NOGROUP-ASSIGNED | The first group assigned, it means they dont have (groupe-title\") completed \n")  # Écrire le titre NOGROUP en premier
             f.write("######################################################################################################################\n")
 
             # Ajouter .NOGROUP-ASSIGNED si des groupes vides ont été trouvés
-            if empty_group_found:
-                f.write(".NOGROUP-ASSIGNED\n")
+            if empty_group_count:
+                f.write(f"{NOGROUP_TITLE}{GROUP_COUNT_SEPARATOR}{empty_group_count} entrées\n")
 
+            # Le nombre d'entrées de chaque groupe est indiqué en commentaire (s'il est connu)
             for group in sorted_groups:
-                f.write(group + "\n")
+                if group_counts[group]:
+                    f.write(f"{group}{GROUP_COUNT_SEPARATOR}{group_counts[group]} entrées\n")
+                else:
+                    f.write(f"{group}\n")
 
-        print(f"*** {len(sorted_groups)} groupes récupérés et écrits dans unwantedgroup.cfg.")
+        total_entries = sum(group_counts.values()) + empty_group_count
+        print(f"*** {len(sorted_groups)} groupes récupérés" + (f" ({total_entries} entrées)" if total_entries else "")
+              + " et écrits dans unwantedgroup.cfg.")
 
     # Exécution des étapes
-    m3u8_file = get_m3u8_file_path()
-    if m3u8_file:
-        retrieve_groups_from_m3u(m3u8_file)
+    m3u8_file = config.m3u8_file
+    if config.xtream_api_enabled and config.download_enabled and not config.sources:
+        # La playlist locale ne contient que les catégories voulues : la liste complète vient du serveur
+        write_groups(xtream_group_counts(config))
+    elif m3u8_file:
+        retrieve_groups_from_m3u(source_files(config))
     else:
         print("*** Aucun fichier M3U8 trouvé dans la configuration.")
 
+######################################################################################################################
+                                   #Manifeste des fichiers générés
+######################################################################################################################
+
+def entry_fingerprint(entry):
+    """Empreinte courte d'une entrée M3U (tous ses attributs et son lien)."""
+    return hashlib.blake2b("\x1f".join(entry).encode('utf-8'), digest_size=8).hexdigest()
+
+class Manifest:
+    """Index persistant (SQLite) des fichiers .strm générés : chemin relatif, lien source et empreinte.
+
+    Le contenu est chargé en mémoire au démarrage ; seules les lignes modifiées pendant
+    l'exécution sont réécrites par save(). En lecture seule (/PLAN), le fichier n'est ni créé
+    ni modifié. La table checkpoint contient le point de reprise d'une génération interrompue,
+    enregistré dans la même transaction que les fichiers écrits. La table nfo liste les tvshow.nfo
+    présents, pour que /PLAN prévoie les mêmes écritures que la génération.
+    """
+
+    def __init__(self, db_path, read_only=False):
+        self.db_path = db_path
+        self.read_only = read_only
+        if not read_only:
+            self.connection = sqlite3.connect(db_path)
+        elif os.path.exists(db_path):
+            self.connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        else:
+            self.connection = sqlite3.connect(":memory:")  # Pas encore de manifeste : aucun fichier connu
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS strm ("
+            "path TEXT PRIMARY KEY, url TEXT NOT NULL, fingerprint TEXT NOT NULL)"
+        )
+        if not read_only:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS checkpoint (id INTEGER PRIMARY KEY, state TEXT NOT NULL)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS nfo (path TEXT PRIMARY KEY)")
+        self.entries = {path: (url, fingerprint) for path, url, fingerprint
+                        in self.connection.execute("SELECT path, url, fingerprint FROM strm")}
+        try:
+            self.nfo = {path for path, in self.connection.execute("SELECT path FROM nfo")}
+        except sqlite3.OperationalError:
+            self.nfo = set()  # Manifeste antérieur ouvert en lecture seule : table absente
+        # Chemins planifiés pendant l'exécution, indexés par leur hash (64 bits) : un entier par chemin au lieu
+        # d'une seconde copie des chaînes. La mémoire reste proportionnelle au nombre de fichiers, entries gardant
+        # déjà tous les chemins ; une collision ne peut que conserver à tort un orphelin, jamais en supprimer un
+        self.seen = set()
+        self._pending = {}
+        self._forgotten = set()
+        self._pending_nfo = set()
+        self._forgotten_nfo = set()
+        self._checkpoint = None
+        self._checkpoint_changed = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, path):
+        return self.entries.get(path)
+
+    def is_current(self, path, fingerprint):
+        row = self.entries.get(path)
+        return row is not None and row[1] == fingerprint
+
+    def was_seen(self, path):
+        return hash(path) in self.seen
+
+    def start_run(self):
+        """Prépare une nouvelle génération avec le même manifeste (mode /WATCH)."""
+        self.seen.clear()
+
+    def mark_seen(self, path):
+        self.seen.add(hash(path))
+
+    def record(self, path, url, fingerprint):
+        self.entries[path] = (url, fingerprint)
+        self._pending[path] = (url, fingerprint)
+        self._forgotten.discard(path)
+        self.seen.add(hash(path))
+
+    def forget(self, path):
+        if self.entries.pop(path, None) is not None:
+            self._forgotten.add(path)
+        self._pending.pop(path, None)
+
+    def record_nfo(self, path):
+        self.nfo.add(path)
+        self._pending_nfo.add(path)
+        self._forgotten_nfo.discard(path)
+
+    def forget_nfo(self, path):
+        if path in self.nfo:
+            self.nfo.discard(path)
+            self._forgotten_nfo.add(path)
+        self._pending_nfo.discard(path)
+
+    def load_checkpoint(self):
+        """Point de reprise enregistré (dict), ou None."""
+        if self.read_only:
+            return None
+        row = self.connection.execute("SELECT state FROM checkpoint WHERE id = 0").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_checkpoint(self, state):
+        """Point de reprise écrit par le prochain save() (None l'efface)."""
+        self._checkpoint = state
+        self._checkpoint_changed = True
+
+    def removed(self):
+        """Chemins présents dans le manifeste mais absents de la playlist traitée."""
+        return [path for path in self.entries if hash(path) not in self.seen]
+
+    def save(self):
+        if self.read_only:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO strm (path, url, fingerprint) VALUES (?, ?, ?)",
+                ((path, url, fingerprint) for path, (url, fingerprint) in self._pending.items()),
+            )
+            self.connection.executemany("DELETE FROM strm WHERE path = ?", ((path,) for path in self._forgotten))
+            self.connection.executemany("INSERT OR IGNORE INTO nfo (path) VALUES (?)",
+                                        ((path,) for path in self._pending_nfo))
+            self.connection.executemany("DELETE FROM nfo WHERE path = ?", ((path,) for path in self._forgotten_nfo))
+            if self._checkpoint_changed:
+                self.connection.execute("DELETE FROM checkpoint")
+                if self._checkpoint is not None:
+                    self.connection.execute("INSERT INTO checkpoint (id, state) VALUES (0, ?)",
+                                            (json.dumps(self._checkpoint, ensure_ascii=False),))
+        self._pending.clear()
+        self._forgotten.clear()
+        self._pending_nfo.clear()
+        self._forgotten_nfo.clear()
+        self._checkpoint_changed = False
+
+    def close(self):
+        self.connection.close()
+
+def iter_strm_files(out_directory, sub_directories, nfo=False):
+    """Parcourt les sous-dossiers de OutDirectory avec os.scandir et génère (chemin relatif, chemin complet) des .strm
+    (et des tvshow.nfo avec nfo)."""
+    stack = [sub_directory for sub_directory in sub_directories
+             if os.path.isdir(os.path.join(out_directory, sub_directory))]
+    while stack:
+        relative_directory = stack.pop()
+        with os.scandir(os.path.join(out_directory, relative_directory)) as it:
+            for dir_entry in it:
+                relative_path = os.path.join(relative_directory, dir_entry.name)
+                if dir_entry.is_dir(follow_symlinks=False):
+                    stack.append(relative_path)
+                elif dir_entry.name.endswith(".strm") or (nfo and dir_entry.name == SERIES_NFO_FILE):
+                    yield relative_path, dir_entry.path
+
+def rebuild_manifest(config):
+    """Réconcilie le manifeste avec l'arborescence réelle (commande /REBUILD)."""
+    manifest = Manifest(config.manifest_file)
+    try:
+        on_disk = set()
+        added = 0
+        for relative_path, full_path in iter_strm_files(config.out_directory, (config.tv_sub_dir, "OTHERS"), nfo=True):
+            on_disk.add(relative_path)
+            if os.path.basename(relative_path) == SERIES_NFO_FILE:
+                manifest.record_nfo(relative_path)
+                continue
+            with open(full_path, 'r', encoding='utf-8') as strm_file:
+                url = strm_file.read().strip()
+            row = manifest.lookup(relative_path)
+            if row is None or row[0] != url:
+                # Empreinte inconnue : l'entrée sera revérifiée à la prochaine exécution
+                manifest.record(relative_path, url, "")
+                added += 1
+
+        missing = [path for path in manifest.entries if path not in on_disk]
+        for path in missing:
+            manifest.forget(path)
+        for path in [path for path in manifest.nfo if path not in on_disk]:
+            manifest.forget_nfo(path)
+
+        manifest.save()
+        print(f"*** Manifeste reconstruit : {len(manifest)} fichiers, {added} ajoutés ou corrigés, "
+              f"{len(missing)} retirés (absents du disque).")
+    finally:
+        manifest.close()
+
+def remove_empty_directories(out_directory, directories):
+    """Supprime les dossiers vides (et leurs parents devenus vides) sans remonter au-delà de TV/ ou OTHERS/.
+
+    Un dossier de série qui ne contient plus que son tvshow.nfo est considéré comme vide.
+    """
+    candidates = set()
+    for directory in directories:
+        while directory and os.path.dirname(directory):
+            candidates.add(directory)
+            directory = os.path.dirname(directory)
+
+    removed = 0
+    # Les dossiers les plus profonds d'abord pour libérer leurs parents
+    for directory in sorted(candidates, key=lambda path: path.count(os.sep), reverse=True):
+        full_directory = os.path.join(out_directory, directory)
+        try:
+            if os.listdir(full_directory) == [SERIES_NFO_FILE]:
+                os.remove(os.path.join(full_directory, SERIES_NFO_FILE))
+            os.rmdir(full_directory)
+            removed += 1
+        except OSError:
+            pass  # Dossier non vide ou déjà supprimé
+    return removed
+
+def prune_allowed(config, manifest, orphans):
+    """Sécurité : une playlist tronquée par le fournisseur ne doit pas vider la médiathèque."""
+    percent = len(orphans) * 100 / len(manifest)
+    if percent > config.prune_max_percent:
+        error_message = (f"*** Nettoyage annulé : {len(orphans)} fichiers sur {len(manifest)} ({percent:.1f} %) "
+                         f"seraient supprimés, au-delà du seuil PruneMaxPercent ({config.prune_max_percent} %).")
+        print(error_message)
+        log_error(error_message)
+        return False
+    return True
+
+def prune_orphans(config, manifest, orphans=None):
+    """Supprime les .strm du manifeste absents de la playlist traitée, puis les dossiers devenus vides."""
+    orphans = manifest.removed() if orphans is None else orphans
+    if not orphans or not prune_allowed(config, manifest, orphans):
+        return 0
+
+    if config.prune_dry_run:
+        for path in sorted(orphans):
+            print(f"*** [Simulation] Suppression de {path}")
+        print(f"*** [Simulation] {len(orphans)} fichiers .strm seraient supprimés.")
+        return 0
+
+    deleted = 0
+    directories = set()
+    for path in orphans:
+        try:
+            os.remove(os.path.join(config.out_directory, path))
+            deleted += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log_error(f"*** Erreur lors de la suppression de {path} : {e}")
+            continue
+        manifest.forget(path)
+        directories.add(os.path.dirname(path))
+
+    removed_directories = remove_empty_directories(config.out_directory, directories)
+    # tvshow.nfo supprimés avec le dossier de leur série
+    for path in [path for path in manifest.nfo if not os.path.exists(os.path.join(config.out_directory, path))]:
+        manifest.forget_nfo(path)
+    print(f"*** Nettoyage : {deleted} fichiers .strm et {removed_directories} dossiers vides supprimés.")
+    return deleted
+
 ######################################################################################################################
                                    #Paramètres Fonction FOLDER GENERATOR
 ######################################################################################################################
-def log_results(new_tv, new_others):
-    log_directory = "log"
+LOG_DIRECTORY = "log"
+LOG_BUFFER_SIZE = 1024 * 1024
+
+def log_timestamp():
+    """Horodatage des noms de fichiers journaux (sans ':', refusé par les partages SMB)."""
+    return datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+class ResultsLog:
+    """Journaux NewTV/NewOthers : un en-tête par groupe, comme log_results, en mémoire bornée.
+
+    Les titres sont regroupés dans un tampon d'au plus LOG_BUFFER_SIZE octets, vidé par blocs
+    dans un fichier <journal>.part dont seuls les emplacements (position, longueur) par groupe
+    restent en mémoire. close() assemble le journal groupe par groupe, dans l'ordre de première
+    apparition. Seuls des compteurs par groupe restent en mémoire, avec au plus `sample_size` titres
+    par groupe pour le détail des notifications.
+    """
+
+    def __init__(self, log_directory=LOG_DIRECTORY, sample_size=None):
+        self.log_directory = log_directory
+        self.sample_size = NOTIFY_DIGEST_MAX_TITLES if sample_size is None else sample_size
+        self.stamp = log_timestamp()
+        self.now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.spools = {}
+        self.buffered = {GROUP_TV: {}, GROUP_OTHERS: {}}  # type -> {groupe: titres pas encore vidés}
+        self.buffered_size = 0
+        self.chunks = {GROUP_TV: {}, GROUP_OTHERS: {}}  # type -> {groupe: [(position, longueur) dans le .part]}
+        self.counts = {GROUP_TV: {}, GROUP_OTHERS: {}}  # type -> {groupe: nombre de nouveaux titres}
+        self.samples = {GROUP_TV: {}, GROUP_OTHERS: {}}
+
+    def _path(self, kind):
+        name = "NewTV" if kind == GROUP_TV else "NewOthers"
+        return os.path.join(self.log_directory, f"{name}-{self.stamp}.txt")
+
+    def _spool(self, kind):
+        spool = self.spools.get(kind)
+        if spool is None:
+            os.makedirs(self.log_directory, exist_ok=True)
+            spool = self.spools[kind] = open(f"{self._path(kind)}.part", 'a+b')
+        return spool
+
+    def _spill(self):
+        """Vide le tampon dans les fichiers .part, un bloc par groupe."""
+        for kind, groups in self.buffered.items():
+            if not groups:
+                continue
+            spool = self._spool(kind)
+            for group_title, titles in groups.items():
+                data = "".join(f"{title}\n" for title in titles).encode('utf-8')
+                self.chunks[kind].setdefault(group_title, []).append((spool.tell(), len(data)))
+                spool.write(data)
+            groups.clear()
+        self.buffered_size = 0
+
+    def state(self):
+        """État sérialisable (JSON) pour un point de reprise ; le tampon est d'abord vidé sur le disque."""
+        self._spill()
+        for spool in self.spools.values():
+            spool.flush()
+        return {"stamp": self.stamp, "now": self.now, "chunks": self.chunks,
+                "counts": self.counts, "samples": self.samples,
+                "sizes": {kind: spool.tell() for kind, spool in self.spools.items()}}
+
+    @classmethod
+    def restore(cls, state, log_directory=LOG_DIRECTORY, sample_size=None):
+        """Reprend les journaux d'une exécution interrompue, sans les titres écrits après son point de reprise."""
+        results_log = cls(log_directory, sample_size)
+        results_log.stamp, results_log.now = state["stamp"], state["now"]
+        results_log.counts = {kind: dict(state["counts"].get(kind, {})) for kind in (GROUP_TV, GROUP_OTHERS)}
+        results_log.samples = {kind: dict(state["samples"].get(kind, {})) for kind in (GROUP_TV, GROUP_OTHERS)}
+        for kind, size in state["sizes"].items():
+            spool_path = f"{results_log._path(kind)}.part"
+            if not os.path.exists(spool_path):
+                continue  # Fichier perdu : les titres d'avant l'interruption manqueront au journal
+            with open(spool_path, 'r+b') as spool:
+                spool.truncate(size)
+            results_log.chunks[kind] = {group_title: [tuple(chunk) for chunk in chunks]
+                                        for group_title, chunks in state["chunks"][kind].items()}
+            results_log.spools[kind] = open(spool_path, 'a+b')
+        return results_log
+
+    def add(self, kind, group_title, title):
+        self.buffered[kind].setdefault(group_title, []).append(title)
+        self.buffered_size += len(title) + 1
+        if self.buffered_size >= LOG_BUFFER_SIZE:
+            self._spill()
+
+        counts = self.counts[kind]
+        counts[group_title] = counts.get(group_title, 0) + 1
+        sample = self.samples[kind].setdefault(group_title, [])
+        if len(sample) < self.sample_size:
+            sample.append(title)
+
+    def total(self, kind):
+        return sum(self.counts[kind].values())
+
+    def digest(self, kind):
+        """{groupe: (nombre de nouveaux titres, premiers titres)} pour les notifications."""
+        return {group_title: (count, self.samples[kind][group_title])
+                for group_title, count in self.counts[kind].items()}
+
+    def close(self):
+        """Assemble les journaux (un en-tête par groupe) et supprime les fichiers .part."""
+        self._spill()
+        for kind, spool in self.spools.items():
+            with open(self._path(kind), 'a', encoding='utf-8', buffering=LOG_BUFFER_SIZE) as log_file:
+                log_file.write(f"Log pour {self.now}\n")
+                for group_title, chunks in self.chunks[kind].items():
+                    log_file.write(f"--------------------\n{group_title}\n")
+                    for offset, length in chunks:
+                        spool.seek(offset)
+                        log_file.write(spool.read(length).decode('utf-8'))
+                log_file.write("---------------------------------------------------\n")
+            spool.close()
+            os.remove(f"{self._path(kind)}.part")
+        self.spools.clear()
+
+def rotate_logs(compress_days, retention_days, log_directory=LOG_DIRECTORY):
+    """Compresse (gzip) les journaux .txt de plus de compress_days jours et supprime les archives
+    de plus de retention_days jours (0 = désactivé) ; renvoie (compressés, supprimés)."""
+    if not os.path.isdir(log_directory) or not (compress_days or retention_days):
+        return 0, 0
+    now = time.time()
+    compressed = removed = 0
+    with os.scandir(log_directory) as it:
+        dir_entries = [dir_entry for dir_entry in it if dir_entry.is_file()]
+    for dir_entry in dir_entries:
+        age_days = (now - dir_entry.stat().st_mtime) / 86400
+        try:
+            if dir_entry.name.endswith(".txt") and compress_days and age_days > compress_days:
+                with open(dir_entry.path, 'rb') as source, gzip.open(f"{dir_entry.path}.gz", 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                # L'archive garde la date du journal pour le calcul de la rétention
+                os.utime(f"{dir_entry.path}.gz", (dir_entry.stat().st_atime, dir_entry.stat().st_mtime))
+                os.remove(dir_entry.path)
+                compressed += 1
+            elif dir_entry.name.endswith(".txt.gz") and retention_days and age_days > retention_days:
+                os.remove(dir_entry.path)
+                removed += 1
+        except OSError as e:
+            log_error(f"*** Erreur lors de la rotation du journal {dir_entry.name} : {e}")
+    return compressed, removed
+
+def log_duplicates(duplicates):
+    """Journal des doublons regroupés : fichier ignoré -> fichier conservé ; renvoie son chemin."""
+    log_directory = LOG_DIRECTORY
     if not os.path.exists(log_directory):
         os.makedirs(log_directory)
 
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    tv_log_file_path = os.path.join(log_directory, f"NewTV-{now}.txt")
-    others_log_file_path = os.path.join(log_directory, f"NewOthers-{now}.txt")
-
-    if new_tv:
-        with open(tv_log_file_path, 'a', encoding='utf-8') as log_file:
-            log_file.write(f"Log pour {now}\n")
-            for group_title, tvs in new_tv.items():
-                log_file.write(f"--------------------\n{group_title}\n")
-                log_file.write("\n".join(tvs) + "\n")
-            log_file.write("---------------------------------------------------\n")
-
-    if new_others:
-        with open(others_log_file_path, 'a', encoding='utf-8') as log_file:
-            log_file.write(f"Log pour {now}\n")
-            for group_title, tvs in new_others.items():
-                log_file.write(f"--------------------\n{group_title}\n")
-                log_file.write("\n".join(tvs) + "\n")
-            log_file.write("---------------------------------------------------\n")
-
-def log_global_script_status(total_tv_added, total_others_added, execution_time):
-    log_directory = "log"
+    duplicates_log_file_path = os.path.join(log_directory, f"Duplicates-{log_timestamp()}.txt")
+
+    with open(duplicates_log_file_path, 'a', encoding='utf-8') as log_file:
+        log_file.write(f"Log pour {now}\n")
+        for dropped, kept in duplicates:
+            log_file.write(f"{dropped} -> {kept}\n")
+        log_file.write("---------------------------------------------------\n")
+    return duplicates_log_file_path
+
+def log_global_script_status(total_tv_added, total_others_added, execution_time, strm_counts=None):
+    log_directory = LOG_DIRECTORY
     if not os.path.exists(log_directory):
         os.makedirs(log_directory)
 
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    global_log_file_path = os.path.join(log_directory, f"ScriptSuccess-{now}.txt")
+    global_log_file_path = os.path.join(log_directory, f"ScriptSuccess-{log_timestamp()}.txt")
 
     with open(global_log_file_path, 'a', encoding='utf-8') as log_file:
         log_file.write(f"Traitement Terminé le {now}\n")
         log_file.write(f"Total Chaînes TV ajoutées : {total_tv_added}\n")
         log_file.write(f"Total Others TV ajoutées : {total_others_added}\n")
+        if strm_counts:
+            log_file.write(f"Fichiers .strm mis à jour : {strm_counts[STRM_UPDATED]}\n")
+            log_file.write(f"Fichiers .strm inchangés : {strm_counts[STRM_UNCHANGED]}\n")
         log_file.write(f"Temps d'exécution : {execution_time}\n")  # Inclure le temps formaté
         log_file.write("---------------------------------------------------\n")
 
@@ -368,329 +1722,1281 @@ def format_execution_time(seconds):
     seconds = seconds % 60
     return f"{minutes} min {seconds:.2f} s"
 
-def extract_group_title(line):
-    match = re.search(r'group-title="(.*?)"', line)
-    return match.group(1) if match else "Unknown"
-
-def get_prefixes_from_config(file_path):
-    # Lire le fichier Config.cfg
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-
-    # Chercher la ligne avec la clé "PrefixDel"
-    prefix_del = root.find(".//add[@key='PrefixDel']")
+class NameSanitizer:
+    """Nettoyage des noms de dossiers et de fichiers, construit une seule fois à partir de PrefixDel.
 
-    if prefix_del is not None:
-        # Récupérer la valeur et la diviser en une liste de préfixes
-        prefixes = prefix_del.get('value', '').split(',')
-        return [prefix.strip() for prefix in prefixes]  # Retourner une liste de préfixes
-    return []
+    Les préfixes ne sont retirés qu'en début de nom (une seule alternance compilée), puis les
+    caractères interdits sont supprimés par une table de traduction précalculée et les espaces
+    réduits. Les résultats sont mémorisés, les group-title se répétant des dizaines de milliers de fois.
+    """
 
-prefixes_displayed = False
+    # Table de suppression des caractères interdits (les crochets [] sont conservés)
+    _INVALID_CHARS = str.maketrans('', '', '<>:"/\\|?*.')
 
-def prefixes_to_remove():
-    global prefixes_displayed  # Indique que nous utilisons la variable globale
-
-    # Nom du fichier de configuration
-    config_file_name = 'Config.cfg'
+    def __init__(self, prefixes, cache_size=65536):
+        self.prefixes = tuple(prefixes)
+        if self.prefixes:
+            # Préfixes ancrés en début de nom, éventuellement précédés d'espaces ou de caractères interdits
+            alternation = "|".join(re.escape(prefix) for prefix in sorted(self.prefixes, key=len, reverse=True))
+            self._prefix_re = re.compile(rf'^(?:[\s<>:"/\\|?*.]*(?:{alternation}))+')
+        else:
+            self._prefix_re = None
+        self.clean = lru_cache(maxsize=cache_size)(self._clean)
 
-    # Construire le chemin du fichier dans le répertoire actuel
-    config_file_path = os.path.join(os.getcwd(), config_file_name)
+    def _clean(self, name):
+        # Supprimer les préfixes spécifiés
+        if self._prefix_re is not None:
+            name = self._prefix_re.sub('', name, count=1)
 
-    # Vérifier si le fichier de configuration existe
-    if not os.path.exists(config_file_path):
-        print(f"*** Le fichier de configuration '{config_file_name}' est manquant.")
-        print("*** Faire cette commande '/C' pour le générer.")
-        return []  # Retourne une liste vide si le fichier n'existe pas
+        # Supprimer les caractères non valides puis réduire les espaces
+        name = ' '.join(name.translate(self._INVALID_CHARS).split())
 
-    # Récupérer les préfixes
-    prefixes_to_remove = get_prefixes_from_config('Config.cfg')
+        # Remplacer "4K" ou "4k" par "UHD"
+        return name.replace('4K', 'UHD').replace('4k', 'UHD')
 
-    # Affichage unique des préfixes
-    if not prefixes_displayed:  # Vérifier si le message a déjà été affiché
-        print("*** Prefixes to remove:", prefixes_to_remove)
-        prefixes_displayed = True  # Marquer le message comme affiché
+_sanitizers = {}
 
-    # Retourner les préfixes
-    return prefixes_to_remove
+def get_sanitizer(prefixes):
+    """Renvoie le NameSanitizer partagé pour ce tuple de préfixes."""
+    sanitizer = _sanitizers.get(prefixes)
+    if sanitizer is None:
+        sanitizer = _sanitizers[prefixes] = NameSanitizer(prefixes)
+    return sanitizer
 
-def clean_directory_name(name):
-    # Récupérer les préfixes à supprimer
-    prefixes = prefixes_to_remove()  # Appel de la fonction pour obtenir la liste des préfixes
-    # Supprimer les préfixes spécifiés
-    for prefix in prefixes:
-        name = name.replace(prefix, '')  # Remplacer le préfixe par une chaîne vide
+def clean_directory_name(name, prefixes):
+    return get_sanitizer(prefixes).clean(name)
 
-    # Nettoyer les caractères non valides sauf les crochets []
-    name = re.sub(r'[<>:"/\\|?*...]', '', name)  # Retirer [ et ] de la liste
-    name = re.sub(r'\s+', ' ', name).strip()
+def clean_file_name(name, prefixes):
+    return get_sanitizer(prefixes).clean(name)
 
-    # Remplacer "4K" ou "4k" par "UHD"
-    name = name.replace('4K', 'UHD').replace('4k', 'UHD')
+NOGROUP_TITLE = ".NOGROUP-ASSIGNED"
+GROUP_TV = "TV"
+GROUP_OTHERS = "OTHERS"
 
-    return name
+class GroupFilter:
+    """Filtre des group-title indésirables, chargé une seule fois par exécution.
 
-def clean_file_name(name):
-    # Récupérer les préfixes à supprimer
-    prefixes = prefixes_to_remove()  # Appel de la fonction pour obtenir la liste des préfixes
-    # Supprimer les préfixes spécifiés
-    for prefix in prefixes:
-        name = name.replace(prefix, '')  # Remplacer le préfixe par une chaîne vide
+    Les lignes de unwantedgroup.cfg sont comparées à l'identique (set, O(1)), y compris
+    celles qui contiennent '*' ou commencent par '#' (ex : 'VOD *NEW*', '#1 SPORTS').
+    Seule une ligne préfixée par 'glob:' est un joker (ex : 'glob:VOD - *') et une ligne
+    préfixée par 're:' une expression régulière ; ces motifs sont compilés au chargement.
+    Le résultat de la classification est mémorisé par group-title.
+    """
 
-    # Supprimer les caractères non valides, y compris ':'
-    name = re.sub(r'[<>:"/\\|?*:...]', '', name)
+    def __init__(self, exact=(), patterns=()):
+        self.exact = frozenset(exact)
+        self.patterns = tuple(patterns)
+        self._decisions = {}
 
-    # Remplacer "4K" ou "4k" par "UHD"
-    name = name.replace('4K', 'UHD').replace('4k', 'UHD')
+    @classmethod
+    def from_lines(cls, lines):
+        exact, patterns = set(), []
+        for line in lines:
+            # Retirer le nombre d'entrées ajouté en commentaire par /U
+            line = line.split(GROUP_COUNT_SEPARATOR, 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith('re:'):
+                patterns.append(re.compile(line[3:]))
+            elif line.startswith('glob:'):
+                patterns.append(re.compile(re.escape(line[5:]).replace(r'\*', '.*')))
+            else:
+                exact.add(line)
+        return cls(exact, patterns)
 
-    return re.sub(r'\s+', ' ', name).strip()
+    def __len__(self):
+        return len(self.exact) + len(self.patterns)
 
-def extract_tvg_name(line):
-    match = re.search(r'tvg-name="(.*?)"', line)
-    return match.group(1) if match else "Unknown"
+    def is_unwanted(self, group_title):
+        if group_title in self.exact:
+            return True
+        return any(pattern.fullmatch(group_title) for pattern in self.patterns)
 
-def get_directory_names(config_path):
-    tree = ET.parse(config_path)
-    root = tree.getroot()
-    tv_dir = root.find(".//add[@key='TVSubDir']").get('value')
-    return tv_dir
+    def classify(self, group_title):
+        """Renvoie GROUP_TV, GROUP_OTHERS ou None si le groupe est indésirable."""
+        try:
+            return self._decisions[group_title]
+        except KeyError:
+            pass
+
+        if self.is_unwanted(group_title):
+            decision = None
+        elif "|" in group_title:
+            decision = GROUP_TV
+        elif not group_title and self.is_unwanted(NOGROUP_TITLE):
+            decision = None
+        else:
+            decision = GROUP_OTHERS
+        self._decisions[group_title] = decision
+        return decision
 
-def read_unwanted_group(unwanted_file_path):
-    """Lit le fichier unwantedgroup.cfg et renvoie une liste de group-title indésirables."""
+def load_group_filter(unwanted_file_path):
+    """Lit le fichier unwantedgroup.cfg et renvoie un GroupFilter (None si le fichier n'existe pas)."""
     if not os.path.exists(unwanted_file_path):
-        return  # Retourne une liste vide si le fichier n'existe pas
+        return None
 
     with open(unwanted_file_path, 'r', encoding='utf-8') as file:
-        unwanted_groups = {line.strip() for line in file if line.strip()}  # Utilisation d'un set pour éviter les doublons
+        group_filter = GroupFilter.from_lines(file)
 
-    if not unwanted_groups:
+    if not group_filter:
         log_error("Aucun groupe indésirable trouvé dans le fichier.")  # Enregistrer une information si le fichier est vide
 
-    return unwanted_groups
-
-def process_tv(line, output_directory, link, config_path):
-    group_title = extract_group_title(line)
-    tvg_name = extract_tvg_name(line)
-
-    tv_dir = get_directory_names(config_path)
-
-    tv_directory = os.path.join(output_directory, tv_dir, clean_directory_name(group_title))
+    return group_filter
 
-    # Création du dossier avec exist_ok=True
-    os.makedirs(tv_directory, exist_ok=True)
+def tv_target(entry, config):
+    """Renvoie (dossier relatif à OutDirectory, nom de fichier nettoyé) d'une chaîne TV."""
+    file_title = clean_file_name(entry.tvg_name, config.prefix_del)
+    directory = os.path.join(config.tv_sub_dir, clean_directory_name(entry.group_title, config.prefix_del))
+    return directory, file_title
 
-    file_name = f"{clean_file_name(tvg_name)}.strm"
-    full_file_path = os.path.join(tv_directory, file_name)
-
-    # Vérifier si le fichier existe déjà
-    if not os.path.exists(full_file_path):
-        with open(full_file_path, 'w', encoding='utf-8') as tv_file:
-            tv_file.write(link)
-        return 1, clean_file_name(tvg_name)  # Renvoie 1 et le nom de la chaîne
-    return 0, clean_file_name(tvg_name)
-
-def process_others(line, output_directory, link, config_path):
-    group_title = extract_group_title(line)  # Extraction du titre de groupe
-    tvg_name = extract_tvg_name(line)  # Extraction du nom TVG
-
-    # Récupération du répertoire de sortie à partir de la configuration
-    tree = ET.parse(config_path)
-    root = tree.getroot()
-    out_directory = root.find(".//add[@key='OutDirectory']").get('value')
-
-    # Vérification de l'existence de groupes indésirables dans unwantedgroup.cfg
-    unwanted_group_file = "unwantedgroup.cfg"  # Remplacez par le chemin correct si nécessaire
-    unwanted_groups = read_unwanted_group(unwanted_group_file)
+def others_target(entry, config):
+    """Renvoie (dossier relatif à OutDirectory, nom de fichier nettoyé) d'un film ou d'une série."""
+    group_title = entry.group_title
+    tvg_name = entry.tvg_name
+    file_title = clean_file_name(tvg_name, config.prefix_del)
 
     # Vérification si le group-title est vide
     if not group_title:
-        group_title = ".NOGROUP-ASSIGNED"  # Assigner le groupe pour les titres vides
+        group_title = NOGROUP_TITLE  # Assigner le groupe pour les titres vides
 
-    # Vérifier si le groupe est dans les groupes indésirables
-    if group_title in unwanted_groups:
-        return 0, clean_file_name(tvg_name)  # Ne pas télécharger si le groupe est indésirable
+    # Préparation du chemin de répertoire pour le groupe
+    group_directory = os.path.join("OTHERS", clean_directory_name(group_title, config.prefix_del))
 
-    others_directory = os.path.join(out_directory, "OTHERS")
+    series_name = re.sub(r' S\d+ E\d+', '', tvg_name)  # Retirer la partie S01 E01, etc.
+    series_name_clean = clean_directory_name(series_name, config.prefix_del)
+    return os.path.join(group_directory, series_name_clean), file_title
+
+# Résultat de l'écriture d'un fichier .strm
+STRM_NEW = "new"
+STRM_UPDATED = "updated"
+STRM_UNCHANGED = "unchanged"
+STRM_FAILED = "failed"
+STRM_RESUMED = "resumed"  # Déjà écrit par l'exécution interrompue reprise (compté comme nouveau ou mis à jour)
+
+def atomic_write_text(path, content):
+    """Écrit le fichier via un fichier temporaire puis os.replace : aucun lecteur ne voit de fichier à moitié écrit."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as temp_file:
+            temp_file.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def read_strm(path):
+    """Renvoie le lien contenu dans un fichier .strm, ou None s'il n'existe pas."""
+    try:
+        with open(path, 'r', encoding='utf-8') as strm_file:
+            return strm_file.read().strip()
+    except FileNotFoundError:
+        return None
+
+# Écriture d'un fichier .strm planifiée pour une entrée nouvelle ou modifiée
+StrmAction = namedtuple("StrmAction", ("kind", "group_title", "directory", "file_title", "url", "fingerprint"))
+
+class WritePlan:
+    """Liste ordonnée des écritures à effectuer, dossiers cibles dédoublonnés et fichiers orphelins."""
+
+    def __init__(self):
+        self.actions = []
+        self.directories = {}  # dict utilisé comme ensemble ordonné
+        self.unchanged = 0
+        self.orphans = []  # Chemins du manifeste absents de la playlist (supprimés si PruneEnabled)
+        self.duplicates = []  # (fichier ignoré, fichier conservé) des doublons entre groupes (DedupEnabled)
+        self.series = {}  # Dossier de chaque série -> titre (SeasonFolders), pour les tvshow.nfo
+        self.entries = 0  # Entrées lues dans la playlist
+        self.groups = set()  # group-title distincts de la playlist
+
+    def add(self, action):
+        self.actions.append(action)
+        self.directories[action.directory] = None
+
+def plan_strm(kind, entry, directory, file_title, manifest=None, fingerprint=None):
+    """Renvoie la StrmAction à exécuter pour une entrée, ou None si le fichier est déjà à jour.
+
+    Un fichier dont le lien n'a pas changé n'est jamais réécrit : sa date de modification
+    reste intacte et Emby/Plex ne relancent pas d'analyse.
+    """
+    relative_path = os.path.join(directory, f"{file_title}.strm")
+    fingerprint = fingerprint or entry_fingerprint(entry)
+
+    if manifest is not None:
+        # Doublon dans la playlist ou entrée inchangée depuis la dernière exécution : aucun accès disque
+        if manifest.was_seen(relative_path) or manifest.is_current(relative_path, fingerprint):
+            manifest.mark_seen(relative_path)
+            return None
+
+        # Seuls les attributs ont changé, le lien enregistré est identique : aucun accès disque
+        row = manifest.lookup(relative_path)
+        if row is not None and row[0] == entry.url:
+            manifest.record(relative_path, entry.url, fingerprint)
+            return None
+
+        manifest.mark_seen(relative_path)
+
+    return StrmAction(kind, entry.group_title, directory, file_title, entry.url, fingerprint)
+
+def execute_strm(action, out_directory, metrics=None, resumed_since=None):
+    """Écrit le fichier .strm de l'action si son contenu diffère ; renvoie STRM_NEW/UPDATED/UNCHANGED/FAILED.
+
+    Lors d'une reprise, un fichier déjà à jour modifié après resumed_since (début de l'exécution
+    interrompue) a été écrit par celle-ci après son dernier point de reprise : STRM_RESUMED.
+    """
+    full_file_path = os.path.join(out_directory, action.directory, f"{action.file_title}.strm")
+    try:
+        # Comparer le lien existant avant de réécrire le fichier
+        current_url = read_strm(full_file_path)
+        if current_url == action.url:
+            if metrics is not None:
+                metrics.count("filesystem_calls", 1)
+            if resumed_since is not None and os.path.getmtime(full_file_path) >= resumed_since:
+                return STRM_RESUMED
+            return STRM_UNCHANGED
+        atomic_write_text(full_file_path, action.url)
+        if metrics is not None:
+            metrics.count("filesystem_calls", 3)  # lecture, écriture du temporaire, renommage
+            metrics.count("bytes_written", len(action.url.encode('utf-8')))
+        return STRM_NEW if current_url is None else STRM_UPDATED
 
-    # Préparation du chemin de répertoire pour le groupe
-    group_directory = os.path.join(others_directory, clean_directory_name(group_title))
+    except Exception as e:
+        log_error(f"Erreur lors de l'écriture du fichier: {str(e)}")
+        return STRM_FAILED
 
-    # Vérifier si le répertoire du groupe doit être créé
-    if not os.path.exists(group_directory):
-        os.makedirs(group_directory)  # Créer le répertoire du groupe s'il n'existe pas
+def make_directory(full_directory, metrics=None):
+    try:
+        os.makedirs(full_directory, exist_ok=True)
+        if metrics is not None:
+            metrics.count("directories_created")
+            metrics.count("filesystem_calls")
+    except OSError as e:
+        log_error(f"*** Erreur lors de la création du dossier {full_directory} : {e}")
+
+def run_bounded(executor, function, items, max_pending):
+    """Équivalent de executor.map avec au plus max_pending tâches en file ; les résultats restent dans l'ordre."""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def iter_write_plan(plan, config, metrics=None, resumed_since=None):
+    """Crée chaque dossier une seule fois puis écrit les fichiers ; génère les statuts dans l'ordre du plan."""
+    metrics = metrics or RunMetrics()
+    out_directory = config.out_directory
+    full_directories = [os.path.join(out_directory, directory) for directory in plan.directories]
+
+    def mkdir(full_directory):
+        make_directory(full_directory, metrics)
+
+    def write(action):
+        return execute_strm(action, out_directory, metrics, resumed_since)
+
+    if config.workers <= 1:
+        with metrics.stage("mkdir"):
+            for full_directory in full_directories:
+                mkdir(full_directory)
+        with metrics.stage("write"):
+            for action in plan.actions:
+                yield write(action)
+        return
 
-    series_name = re.sub(r' S\d+ E\d+', '', tvg_name)  # Retirer la partie S01 E01, etc.
-    series_name_clean = clean_directory_name(series_name)
-    series_sub_dir = os.path.join(group_directory, series_name_clean)
+    max_pending = config.workers * 4
+    with ThreadPoolExecutor(max_workers=config.workers) as executor:
+        with metrics.stage("mkdir"):
+            for _ in run_bounded(executor, mkdir, full_directories, max_pending):
+                pass
+        with metrics.stage("write"):
+            yield from run_bounded(executor, write, plan.actions, max_pending)
 
-    os.makedirs(series_sub_dir, exist_ok=True)  # Créer le sous-dossier pour la série
+def execute_write_plan(plan, config, metrics=None):
+    """Comme iter_write_plan ; renvoie la liste des statuts dans l'ordre du plan."""
+    return list(iter_write_plan(plan, config, metrics))
 
-    file_name = f"{clean_file_name(tvg_name)}.strm"
-    full_file_path = os.path.join(series_sub_dir, file_name)
+######################################################################################################################
+                                   #Filtre et nommage (séquentiel ou réparti sur plusieurs processus)
+######################################################################################################################
 
-    if os.path.exists(full_file_path):
-        return 0, clean_file_name(tvg_name)  # Renvoie 0 et le nom de la chaîne si le fichier existe déjà
+SHARD_CHUNK_SIZE = 10000
+
+def entry_target(entry, config, group_filter):
+    """Renvoie (type, dossier relatif, nom de fichier, empreinte) d'une entrée, ou des None si elle est filtrée."""
+    kind = group_filter.classify(entry.group_title)
+    if kind is None:
+        return None, None, None, None
+    directory, file_title = tv_target(entry, config) if kind == GROUP_TV else others_target(entry, config)
+    return kind, directory, file_title, entry_fingerprint(entry)
+
+def iter_targets(config, group_filter, entries):
+    """Génère (entrée, type, dossier, nom de fichier, empreinte) dans l'ordre de la playlist."""
+    for entry in entries:
+        yield (entry, *entry_target(entry, config, group_filter))
+
+_shard_state = None
+
+def _init_shard_worker(config, group_filter):
+    global _shard_state
+    _shard_state = (config, group_filter)
+
+def plan_shard(batch):
+    """Filtre et nommage d'un lot de (position, entrée) dans un processus du pool."""
+    config, group_filter = _shard_state
+    return [(position, *entry_target(entry, config, group_filter)) for position, entry in batch]
+
+def iter_sharded_targets(config, group_filter, entries):
+    """Comme iter_targets, mais le filtre, le nettoyage des noms et l'empreinte sont calculés par
+    config.shards processus. Les entrées sont lues par blocs et réparties par group-title (le cache
+    des noms de chaque processus reste efficace) ; les résultats sont remis dans l'ordre de la playlist.
+    """
+    from concurrent.futures import ProcessPoolExecutor  # Import différé : multiprocessing seulement si Shards > 1
+
+    shards = config.shards
+    pending = deque()
+
+    def submit(chunk):
+        batches = [[] for _ in range(shards)]
+        for position, entry in enumerate(chunk):
+            batches[hash(entry.group_title) % shards].append((position, entry))
+        pending.append((chunk, [executor.submit(plan_shard, batch) for batch in batches if batch]))
+
+    def drain():
+        chunk, futures = pending.popleft()
+        targets = [None] * len(chunk)
+        for future in futures:
+            for position, *target in future.result():
+                targets[position] = target
+        for entry, target in zip(chunk, targets):
+            yield (entry, *target)
+
+    with ProcessPoolExecutor(max_workers=shards, initializer=_init_shard_worker,
+                             initargs=(config, group_filter)) as executor:
+        chunk = []
+        for entry in entries:
+            chunk.append(entry)
+            if len(chunk) >= SHARD_CHUNK_SIZE:
+                submit(chunk)
+                chunk = []
+                # Au plus deux blocs en attente par processus pour borner la mémoire
+                if len(pending) >= shards * 2:
+                    yield from drain()
+        if chunk:
+            submit(chunk)
+        while pending:
+            yield from drain()
 
-    try:
-        with open(full_file_path, 'w', encoding='utf-8') as series_file:
-            series_file.write(link)
+######################################################################################################################
+                                   #Séries et saisons (index série -> saison -> épisodes)
+######################################################################################################################
 
-        # Vérifier si le dossier OTHERS doit être créé
-        if not os.path.exists(others_directory):
-            os.makedirs(others_directory)
+# Saison et épisode : S01E01, S01 E01, S01.E01, S01-E01 ou 1x01
+_EPISODE_RE = re.compile(r'\bS(\d{1,3})[\s._-]*E(\d{1,4})\b|\b(\d{1,2})x(\d{2,3})\b', re.IGNORECASE)
+
+SERIES_NFO_FILE = "tvshow.nfo"
+
+def parse_episode(name):
+    """Renvoie (nom de la série, saison, épisode, forme SxxEyy) d'un titre d'épisode, ou None."""
+    match = _EPISODE_RE.search(name)
+    if match is None:
+        return None
+    series_name = name[:match.start()].rstrip(" -_.")
+    if not series_name:
+        return None
+    if match.group(1) is not None:
+        return series_name, int(match.group(1)), int(match.group(2)), True
+    return series_name, int(match.group(3)), int(match.group(4)), False
+
+class SeriesIndex:
+    """Index série -> saison -> épisodes de toute la playlist, construit en une analyse par entrée.
+
+    Une série est reconnue à la forme de l'index et non au nom du groupe : au moins un épisode
+    SxxEyy, ou plusieurs épisodes 1x01 (une seule entrée « 2x04 » reste un film).
+    """
+
+    def __init__(self):
+        self.series = {}  # (dossier du groupe, nom de la série) -> {saison: {épisodes}}
+        self.explicit = set()  # Séries avec au moins un épisode SxxEyy
+
+    def add(self, key, season, episode, explicit):
+        self.series.setdefault(key, {}).setdefault(season, set()).add(episode)
+        if explicit:
+            self.explicit.add(key)
+
+    def is_series(self, key):
+        return key in self.explicit or sum(len(episodes) for episodes in self.series[key].values()) > 1
+
+def organize_series(targets, plan, config, metrics):
+    """Range les épisodes dans Série/Season NN (SeasonFolders) ; les films gardent leur dossier.
+
+    Toutes les cibles sont lues avant de décider (une série se reconnaît à l'ensemble de ses épisodes).
+    """
+    index = SeriesIndex()
+    collected = []
+    for target in targets:
+        entry, kind, directory, _, _ = target
+        parsed = parse_episode(entry.tvg_name) if kind == GROUP_OTHERS else None
+        if parsed is None:
+            collected.append((target, None, None))
+            continue
+        series_name, season, episode, explicit = parsed
+        key = (os.path.dirname(directory), clean_directory_name(series_name, config.prefix_del))
+        index.add(key, season, episode, explicit)
+        collected.append((target, key, season))
+
+    series_count = sum(1 for key in index.series if index.is_series(key))
+    metrics.count("series_indexed", series_count)
+    metrics.count("seasons_indexed", sum(len(index.series[key]) for key in index.series if index.is_series(key)))
+
+    for target, key, season in collected:
+        if key is not None and index.is_series(key):
+            entry, kind, _, file_title, fingerprint = target
+            series_directory = os.path.join(*key)
+            plan.series[series_directory] = key[1]
+            target = (entry, kind, os.path.join(series_directory, f"Season {season:02d}"), file_title, fingerprint)
+        yield target
+
+def series_nfo(title):
+    from xml.sax.saxutils import escape  # Import différé : charge urllib.request, http.client et email
+    return ('<?xml version="1.0" encoding="utf-8" standalone="yes"?>\n'
+            f"<tvshow>\n  <title>{escape(title)}</title>\n</tvshow>\n")
+
+def write_series_nfo(plan, config, manifest, metrics=None):
+    """Écrit en une fois les tvshow.nfo des séries du plan absents du manifeste, puis les y enregistre.
+
+    Un fichier déjà présent sur le disque n'est jamais modifié : il est seulement enregistré.
+    """
+    written = 0
+    for series_directory, title in plan.series.items():
+        relative_path = os.path.join(series_directory, SERIES_NFO_FILE)
+        if relative_path in manifest.nfo:
+            continue
+        nfo_path = os.path.join(config.out_directory, relative_path)
+        try:
+            if not os.path.exists(nfo_path):
+                os.makedirs(os.path.dirname(nfo_path), exist_ok=True)
+                atomic_write_text(nfo_path, series_nfo(title))
+                written += 1
+            manifest.record_nfo(relative_path)
+        except OSError as e:
+            log_error(f"*** Erreur lors de l'écriture de {nfo_path} : {e}")
+    if metrics is not None:
+        metrics.count("series_nfo_written", written)
+    return written
 
-        return 1, clean_file_name(tvg_name)  # Renvoie 1 et le nom de la série
+######################################################################################################################
+                                   #Doublons entre groupes (index des titres normalisés)
+######################################################################################################################
 
-    except Exception as e:
-        log_error(f"Erreur lors de l'écriture du fichier: {str(e)}")
-        return 0, clean_file_name(tvg_name)  # Renvoie 0 et le nom de la chaîne en cas d'erreur
+# Ordre de préférence par défaut des qualités (DedupQuality)
+DEDUP_QUALITY_DEFAULT = "2160P,4K,UHD,1080P,FHD,HEVC,720P,HD,SD"
+
+# Balises de qualité retirées des titres avant comparaison
+QUALITY_TAGS = ("2160P", "4K", "UHD", "HDR", "1080P", "FHD", "720P", "HD", "SD", "HEVC", "H265", "X265", "H264", "X264")
+_QUALITY_RE = re.compile(r'(?<![^\W_])(?:' + '|'.join(QUALITY_TAGS) + r')(?![^\W_])', re.IGNORECASE)
+_YEAR_RE = re.compile(r'[(\[]((?:19|20)\d{2})[)\]]')
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+def quality_tags(text):
+    return {tag.upper() for tag in _QUALITY_RE.findall(text)}
+
+@lru_cache(maxsize=65536)
+def normalize_title(file_title):
+    """Clé de comparaison d'un titre : (titre sans balises de qualité, accents ni ponctuation, année)."""
+    years = _YEAR_RE.findall(file_title)
+    title = _QUALITY_RE.sub(" ", _YEAR_RE.sub(" ", file_title))
+    title = "".join(char for char in unicodedata.normalize("NFKD", title) if not unicodedata.combining(char))
+    return " ".join(_NON_WORD_RE.sub(" ", title).casefold().split()), years[-1] if years else ""
+
+class DuplicateIndex:
+    """Index des titres normalisés des entrées OTHERS : une entrée gagnante par titre.
+
+    La gagnante est celle dont la meilleure balise de qualité (tvg-name ou group-title) arrive
+    le plus tôt dans DedupQuality ; à qualité égale, la première dans l'ordre des sources l'emporte.
+    """
+
+    def __init__(self, quality_preference):
+        self.preference = {tag: rank for rank, tag in enumerate(quality_preference)}
+        self.best = {}  # clé normalisée -> (rang de qualité, position de l'entrée gagnante)
+
+    def rank(self, entry):
+        tags = quality_tags(f"{entry.tvg_name} {entry.group_title}")
+        return min((self.preference[tag] for tag in tags if tag in self.preference), default=len(self.preference))
+
+    def add(self, position, entry, file_title):
+        key = normalize_title(file_title)
+        rank = self.rank(entry)
+        best = self.best.get(key)
+        if best is None or rank < best[0]:
+            self.best[key] = (rank, position)
+        return key
+
+    def winner(self, key):
+        return self.best[key][1]
+
+def collapse_duplicates(targets, plan, config):
+    """Garde un seul .strm par titre normalisé (OTHERS) avant toute écriture ; les autres vont dans plan.duplicates.
+
+    Toutes les cibles sont lues avant de choisir les gagnantes : la mémoire utilisée est proportionnelle
+    à la playlist, d'où l'option DedupEnabled.
+    """
+    index = DuplicateIndex(config.dedup_quality)
+    collected = []
+    for position, target in enumerate(targets):
+        entry, kind, directory, file_title, _ = target
+        key = index.add(position, entry, file_title) if kind == GROUP_OTHERS else None
+        collected.append((target, key))
+
+    for position, (target, key) in enumerate(collected):
+        if key is not None and index.winner(key) != position:
+            winner = collected[index.winner(key)][0]
+            path = os.path.join(target[2], f"{target[3]}.strm")
+            kept = os.path.join(winner[2], f"{winner[3]}.strm")
+            # Même fichier dans le même groupe : doublon ordinaire, laissé à plan_strm
+            if path != kept:
+                plan.duplicates.append((path, kept))
+                continue
+        yield target
 
 ######################################################################################################################
-                                   #Fonction FOLDER GENERATOR
+                                   #Plan d'exécution (partagé par la génération et /PLAN)
 ######################################################################################################################
-def folder_generator():
-    start_time = time.time()  # Démarre le compteur de temps
 
-    try:
-        config_path = "Config.cfg"
-        unwanted_groups_path = "unwantedgroup.cfg"  # Chemin vers le fichier unwantedgroup.cfg
-        unwanted_groups = read_unwanted_group(unwanted_groups_path)  # Lecture des groupes indésirables
+PLAN_MKDIR = "mkdir"
+PLAN_CREATE = "create"
+PLAN_UPDATE = "update"
+PLAN_DELETE = "delete"
+PLAN_DUPLICATE = "duplicate"
+PLAN_NFO = "nfo"
+
+def build_write_plan(config, group_filter, manifest, metrics=None):
+    """Lit la playlist, filtre, nomme et compare au manifeste ; renvoie le WritePlan sans toucher OutDirectory."""
+    metrics = metrics or RunMetrics()
+    plan = WritePlan()
+    plan_start = time.perf_counter()
+    def counted(entries):
+        for entry in entries:
+            plan.entries += 1
+            plan.groups.add(entry.group_title)
+            yield entry
+
+    entries = counted(metrics.timed_iter(iter_source_entries(config), "parse"))
+    if config.shards > 1:
+        print(f"*** Filtre et nommage répartis sur {config.shards} processus.")
+        targets = iter_sharded_targets(config, group_filter, entries)
+    else:
+        targets = iter_targets(config, group_filter, entries)
+    if config.season_folders:
+        targets = organize_series(targets, plan, config, metrics)
+    if config.dedup_enabled:
+        targets = collapse_duplicates(targets, plan, config)
 
-        tree = ET.parse(config_path)
-        root = tree.getroot()
-        output_directory = root.find(".//add[@key='OutDirectory']").get('value')
+    for entry, kind, directory, file_title, fingerprint in targets:
+        metrics.count("entries_parsed")
 
-        tv_dir = get_directory_names(config_path)
+        # Classification en une seule recherche (None si le groupe est indésirable)
+        if kind is None:
+            metrics.count("entries_filtered")
+            continue  # Passe au groupe suivant si c'est indésirable
 
-        # Compteurs pour les chaînes TV et autres
-        new_tv, existing_tv, skipped_tv = {}, {}, {}
-        new_others, existing_others, skipped_others = {}, {}, {}
+        # Comparaison au manifeste dans l'ordre de la playlist (le premier doublon l'emporte)
+        action = plan_strm(kind, entry, directory, file_title, manifest, fingerprint)
 
-        m3u8_file = root.find(".//add[@key='m3u8File']").get('value')
+        if action is None:
+            plan.unchanged += 1
+        else:
+            plan.add(action)
+
+    plan.orphans = manifest.removed()
+    metrics.count("entries_parsed", len(plan.duplicates))
+    metrics.count("duplicates_collapsed", len(plan.duplicates))
+
+    # Le temps de lecture du fichier est déjà compté dans l'étape "parse"
+    metrics.add_time("plan", time.perf_counter() - plan_start - metrics.stages["parse"])
+    metrics.count("entries_planned", len(plan.actions))
+    metrics.count("entries_unchanged_in_manifest", plan.unchanged)
+    sanitizer_cache = get_sanitizer(config.prefix_del).clean.cache_info()
+    metrics.count("sanitizer_cache_hits", sanitizer_cache.hits)
+    metrics.count("sanitizer_cache_misses", sanitizer_cache.misses)
+    return plan
+
+def iter_plan_operations(plan, manifest, config):
+    """Génère les opérations du plan (mkdir, create, update, delete) d'après le manifeste, sans accès disque."""
+    # Dossiers déjà connus : ceux qui contiennent un fichier du manifeste, et leurs parents
+    known_directories = set()
+    for path in manifest.entries:
+        directory = os.path.dirname(path)
+        while directory and directory not in known_directories:
+            known_directories.add(directory)
+            directory = os.path.dirname(directory)
+
+    # tvshow.nfo que la génération écrira : ceux des séries absents du manifeste (même règle que write_series_nfo)
+    new_series = [directory for directory in plan.series
+                  if os.path.join(directory, SERIES_NFO_FILE) not in manifest.nfo] if config.series_nfo else []
+
+    for directory in plan.directories:
+        missing = []
+        while directory and directory not in known_directories:
+            known_directories.add(directory)
+            missing.append(directory)
+            directory = os.path.dirname(directory)
+        for path in reversed(missing):
+            yield {"action": PLAN_MKDIR, "path": path}
+
+    for action in plan.actions:
+        path = os.path.join(action.directory, f"{action.file_title}.strm")
+        yield {"action": PLAN_UPDATE if manifest.lookup(path) is not None else PLAN_CREATE, "path": path,
+               "kind": action.kind, "group": action.group_title, "url": action.url}
+
+    for directory in new_series:
+        yield {"action": PLAN_NFO, "path": os.path.join(directory, SERIES_NFO_FILE)}
+
+    for path, kept in plan.duplicates:
+        yield {"action": PLAN_DUPLICATE, "path": path, "kept": kept}
+
+    if config.prune_enabled and plan.orphans and prune_allowed(config, manifest, plan.orphans):
+        for path in sorted(plan.orphans):
+            yield {"action": PLAN_DELETE, "path": path}
+
+def run_plan(config, group_filter, output_path=None):
+    """Commande /PLAN : affiche (ou écrit en JSONL) les opérations d'une génération sans rien écrire."""
+    manifest = Manifest(config.manifest_file, read_only=True)
+    output = None
+    try:
+        plan = build_write_plan(config, group_filter, manifest)
+        counts = {PLAN_MKDIR: 0, PLAN_CREATE: 0, PLAN_UPDATE: 0, PLAN_DELETE: 0, PLAN_DUPLICATE: 0, PLAN_NFO: 0}
+        if output_path:
+            output = open(output_path, 'w', encoding='utf-8')
+
+        for operation in iter_plan_operations(plan, manifest, config):
+            counts[operation["action"]] += 1
+            if output is not None:
+                output.write(json.dumps(operation, ensure_ascii=False) + "\n")
+            elif operation["action"] == PLAN_DUPLICATE:
+                print(f"*** [Plan] {operation['action']:<6} {operation['path']} (conservé : {operation['kept']})")
+            else:
+                print(f"*** [Plan] {operation['action']:<6} {operation['path']}")
+
+        if output is not None:
+            print(f"*** Plan écrit dans {output_path}.")
+        print("*** Plan : {} dossiers à créer, {} fichiers à créer, {} à mettre à jour, {} à supprimer, "
+              "{} inchangés.".format(counts[PLAN_MKDIR], counts[PLAN_CREATE], counts[PLAN_UPDATE],
+                                     counts[PLAN_DELETE], plan.unchanged))
+        if counts[PLAN_NFO]:
+            print(f"*** {counts[PLAN_NFO]} fichiers {SERIES_NFO_FILE} à créer.")
+        if counts[PLAN_DUPLICATE]:
+            print(f"*** {counts[PLAN_DUPLICATE]} doublons entre groupes ne seraient pas générés.")
+        if plan.orphans and not config.prune_enabled:
+            print(f"*** {len(plan.orphans)} fichiers du manifeste ne sont plus présents dans la playlist "
+                  "(PruneEnabled désactivé).")
+        return counts
+    finally:
+        if output is not None:
+            output.close()
+        manifest.close()
 
-        m3u8_file = root.find(".//add[@key='m3u8File']").get('value')
-        with open(m3u8_file, 'r', encoding='utf-8') as m3u8:
-            for line in m3u8:
-                if not line.startswith("#EXTINF"):
-                    continue
+######################################################################################################################
+                                   #Reprise d'une génération interrompue (points de reprise)
+######################################################################################################################
 
-                link = next(m3u8).strip()  # Récupère le lien suivant
-                group_title = extract_group_title(line)
+def run_fingerprint(config, group_filter):
+    """Empreinte d'une génération : playlists (taille, date de modification), configuration et filtre de groupes."""
+    digest = hashlib.sha256(repr(config).encode('utf-8'))
+    for file_path in source_files(config):
+        try:
+            stat = os.stat(file_path)
+            digest.update(f"|{file_path}|{stat.st_size}|{stat.st_mtime_ns}".encode('utf-8'))
+        except OSError:
+            digest.update(f"|{file_path}|-".encode('utf-8'))
+    patterns = [pattern.pattern for pattern in group_filter.patterns]
+    digest.update(repr((sorted(group_filter.exact), patterns)).encode('utf-8'))
+    return digest.hexdigest()
+
+class Checkpoint:
+    """Points de reprise d'une génération, enregistrés avec le manifeste toutes les CheckpointInterval secondes.
+
+    Un point de reprise contient l'empreinte de la génération, la taille de son plan, le nombre de
+    fichiers déjà traités, les compteurs et l'état des journaux des nouveaux titres. Les fichiers
+    déjà écrits sont dans le manifeste et ne sont pas replanifiés : une génération interrompue
+    reprend là où elle s'est arrêtée, avec les totaux de l'exécution complète.
+    """
+
+    def __init__(self, config, group_filter, manifest):
+        self.manifest = manifest
+        self.interval = config.checkpoint_interval
+        self.fingerprint = run_fingerprint(config, group_filter) if self.interval > 0 else None
+        self.started = time.time()
+        self.resumed_since = None  # Début de l'exécution interrompue reprise
+        self.last_save = time.monotonic()
+
+    def load(self):
+        """État de l'exécution interrompue à reprendre, ou None (aucune, ou playlist/configuration/filtre modifiés)."""
+        if self.interval <= 0:
+            return None
+        state = self.manifest.load_checkpoint()
+        if state is None:
+            return None
+        if state.get("fingerprint") != self.fingerprint:
+            print("*** Point de reprise ignoré : la playlist, la configuration ou le filtre ont changé.")
+            self.manifest.set_checkpoint(None)
+            return None
+        self.started = self.resumed_since = state["started"]
+        return state
+
+    def due(self):
+        return self.interval > 0 and time.monotonic() - self.last_save >= self.interval
+
+    def save(self, actions_done, actions_total, strm_counts, results_log):
+        """Enregistre le manifeste et le point de reprise dans une seule transaction."""
+        self.manifest.set_checkpoint({
+            "fingerprint": self.fingerprint,
+            "started": self.started,
+            "actions_done": actions_done,
+            "actions_total": actions_total,
+            "strm_counts": {status: strm_counts[status] for status in (STRM_NEW, STRM_UPDATED)},
+            "log": results_log.state(),
+        })
+        self.manifest.save()
+        self.last_save = time.monotonic()
 
-                # Vérifie si le group-title est dans la liste des indésirables
-                if group_title in unwanted_groups:
-                    continue  # Passe au groupe suivant si c'est indésirable
+######################################################################################################################
+                                   #Fonction FOLDER GENERATOR
+######################################################################################################################
+def folder_generator(config, group_filter, metrics=None, manifest=None):
+    start_time = time.time()  # Démarre le compteur de temps
+    metrics = metrics or RunMetrics()
 
-                # Classification basée sur le group-title
-                if "|" in group_title:
-                    result = process_tv(line, output_directory, link, config_path)
-                    if result[0]:  # Vérifie si une nouvelle chaîne TV a été ajoutée
-                        if group_title not in new_tv:
-                            new_tv[group_title] = []
-                        new_tv[group_title].append(result[1])
+    # Un manifeste fourni (mode /WATCH) reste ouvert en mémoire après la génération
+    owns_manifest = manifest is None
+    results_log = None
+    checkpoint = None
+    writing = False  # Écriture commencée mais pas terminée : point de reprise enregistré en cas d'arrêt
+    try:
+        print("*** Prefixes to remove:", list(config.prefix_del))
 
-                else:
-                    # Si aucune des conditions précédentes n'est remplie, on traite comme "autre"
-                    result = process_others(line, output_directory, link, config_path)
-                    if result[0]:  # Vérifie si un nouveau fichier autre a été ajouté
-                        if group_title not in new_others:
-                            new_others[group_title] = []
-                        new_others[group_title].append(result[1])
+        # Manifeste de la dernière exécution : seules les entrées nouvelles ou modifiées touchent le disque
+        if owns_manifest:
+            with metrics.stage("manifest_load"):
+                manifest = Manifest(config.manifest_file)
+        else:
+            manifest.start_run()
+
+        # Compteurs pour les chaînes TV et autres (les nouveaux titres vont directement dans les journaux)
+        existing_tv, skipped_tv = {}, {}
+        strm_counts = {STRM_NEW: 0, STRM_UPDATED: 0, STRM_UNCHANGED: 0, STRM_FAILED: 0}
+
+        # Génération interrompue avec la même playlist et la même configuration : reprise
+        checkpoint = Checkpoint(config, group_filter, manifest)
+        resume = checkpoint.load()
+
+        # Planification : nommage et comparaison au manifeste, sans accès disque (même plan que /PLAN)
+        plan = build_write_plan(config, group_filter, manifest, metrics)
+        print(f"*** {plan.entries} entrées lues dans {len(plan.groups)} groupes.")
+
+        # Progression rapportée au plan de la génération complète : les fichiers écrits avant l'interruption
+        # ne sont plus planifiés et ceux en échec le sont de nouveau, il reste donc len(plan.actions) fichiers
+        actions_total = len(plan.actions)
+        if resume:
+            actions_total = max(resume.get("actions_total", resume["actions_done"] + actions_total), actions_total)
+        actions_done = actions_total - len(plan.actions)
+        if resume:
+            print(f"*** Reprise de la génération interrompue : {actions_done} fichiers sur {actions_total} déjà traités.")
+
+        results_log = ResultsLog.restore(resume["log"]) if resume else ResultsLog()
+        if resume:
+            # Fichiers écrits avant l'interruption : déjà dans le manifeste, donc « inchangés » dans ce plan
+            strm_counts.update(resume["strm_counts"])
+            strm_counts[STRM_UNCHANGED] -= strm_counts[STRM_NEW] + strm_counts[STRM_UPDATED]
+        strm_counts[STRM_UNCHANGED] += plan.unchanged
+
+        # Exécution : dossiers créés une seule fois, fichiers écrits par le pool de threads et comptés
+        # dans l'ordre de la playlist pour des journaux identiques au traitement séquentiel
+        writing = True
+        checkpoint.last_save = time.monotonic()
+        for action, status in zip(plan.actions, iter_write_plan(plan, config, metrics, checkpoint.resumed_since)):
+            path = os.path.join(action.directory, f"{action.file_title}.strm")
+            if status == STRM_RESUMED:
+                status = STRM_NEW if manifest.lookup(path) is None else STRM_UPDATED
+            strm_counts[status] += 1
+            if status != STRM_FAILED:
+                manifest.record(path, action.url, action.fingerprint)
+            if status == STRM_NEW:
+                results_log.add(action.kind, action.group_title, action.file_title)
+            actions_done += 1
+            if checkpoint.due():
+                checkpoint.save(actions_done, actions_total, strm_counts, results_log)
+                metrics.count("checkpoints_saved")
+        writing = False
+        manifest.set_checkpoint(None)  # Génération terminée : effacé avec le dernier enregistrement du manifeste
+
+        if config.series_nfo and plan.series:
+            with metrics.stage("nfo"):
+                write_series_nfo(plan, config, manifest, metrics)
+        with metrics.stage("logs"):
+            results_log.close()
+
+        for status, total in strm_counts.items():
+            metrics.count(f"files_{status}", total)
+
+        # Entrées du manifeste qui ne sont plus dans la playlist
+        if config.prune_enabled:
+            with metrics.stage("prune"):
+                metrics.count("files_pruned", prune_orphans(config, manifest, plan.orphans))
+        elif plan.orphans:
+            print(f"*** {len(plan.orphans)} fichiers du manifeste ne sont plus présents dans la playlist.")
 
         # Logging des résultats
-        log_results(new_tv, new_others)
+        with metrics.stage("logs"):
+            if plan.duplicates:
+                print(f"*** {len(plan.duplicates)} doublons entre groupes regroupés "
+                      f"(voir {log_duplicates(plan.duplicates)}).")
+            compressed, removed = rotate_logs(config.log_compress_days, config.log_retention_days)
+            if compressed or removed:
+                print(f"*** Journaux : {compressed} compressés, {removed} archives supprimées.")
 
         # Calcul des totaux pour l'affichage final
-        total_tv_added = sum(len(v) for v in new_tv.values())
-        total_others_added = sum(len(v) for v in new_others.values())
+        total_tv_added = results_log.total(GROUP_TV)
+        total_others_added = results_log.total(GROUP_OTHERS)
 
         execution_time_seconds = time.time() - start_time
         execution_time_formatted = format_execution_time(execution_time_seconds)
 
-        log_global_script_status(total_tv_added, total_others_added, execution_time_formatted)
+        log_global_script_status(total_tv_added, total_others_added, execution_time_formatted, strm_counts)
 
         # Affichage des totaux formatés
         print("*** TV-channels summary: {} new, {} skipped (whereof {} dupes), {} in total".format(
             total_tv_added, len(skipped_tv), len(existing_tv), total_tv_added + len(existing_tv)))
 
+        print("*** Fichiers .strm : {} nouveaux, {} mis à jour, {} inchangés, {} en erreur".format(
+            strm_counts[STRM_NEW], strm_counts[STRM_UPDATED], strm_counts[STRM_UNCHANGED], strm_counts[STRM_FAILED]))
+
         print("*** Processing time: {}".format(execution_time_formatted))
 
-        return total_tv_added, total_others_added, execution_time_formatted
+        return GenerationResult(total_tv_added, total_others_added, execution_time_formatted,
+                                results_log.digest(GROUP_TV), results_log.digest(GROUP_OTHERS))
 
     except Exception as e:
         log_error(f"Erreur lors de la génération des dossiers: {str(e)}")
 
+    finally:
+        if writing and checkpoint.interval > 0:
+            checkpoint.save(actions_done, actions_total, strm_counts, results_log)
+        if results_log is not None:
+            results_log.close()
+        if manifest is not None:
+            with metrics.stage("manifest_save"):
+                manifest.save()
+                if owns_manifest:
+                    manifest.close()
+
 ######################################################################################################################
-                                   #Telegram Notification
+                                   #Notifications (Telegram, Discord, webhook)
 ######################################################################################################################
 
-def Telegram_Notification(total_tv_added, total_others_added, execution_time_formatted):
-    # Nom du fichier de configuration
-    config_file_name = 'Config.cfg'
-
-    # Construire le chemin du fichier dans le répertoire actuel
-    config_file_path = os.path.join(os.getcwd(), config_file_name)
-
-    # Vérifier si le fichier de configuration existe
-    if not os.path.exists(config_file_path):
-        print(f"*** Le fichier de configuration '{config_file_name}' est manquant.")
-        print("*** Faire cette commande '/C' pour le générer.")
-        return  # Retourne si le fichier n'existe pas
-
-    # Charger le fichier de configuration
-    tree = ET.parse(config_file_path)
-    root = tree.getroot()
-
-    # Chercher la clé "TelegramBotEnabled"
-    telegrambot_enabled = root.find(".//add[@key='TelegramBotEnabled']")
-    if telegrambot_enabled is None:
-        print("*** Clé 'TelegramBotEnabled' est vide ou introuvable dans la configuration.")
-        return  # Retourne si la clé n'existe pas
-
-    # Vérifier si la valeur est "True" ou "False"
-    if telegrambot_enabled.get('value', 'False') == 'True':
-        # Notifications Telegram sont activées
-        print("*** Notifications Telegram sont activées.")
-
-        # Chercher la clé "TelegramBotToken" pour obtenir le token
-        TelegramBotToken = root.find(".//add[@key='TelegramBotToken']")
-        if TelegramBotToken is not None and TelegramBotToken.get('value'):
-            bot_token = TelegramBotToken.get('value')
-
-            # Chercher la clé "TelegramChatID" pour obtenir l'ID de chat
-            TelegramChatID = root.find(".//add[@key='TelegramChatID']")
-            if TelegramChatID is not None and TelegramChatID.get('value'):
-                chat_id = TelegramChatID.get('value')
-
-                # Construire le message avec les résultats de la fonction folder_generator
-                message = (
-                    "```markdown\n"  # Début du bloc de code
-                    "📝 Résumé du traitement\n"
-                    "===========================\n\n"
-
-                    f"📡 Chaînes TV ajoutées : {total_tv_added}\n\n"
-
-                    f"📁 Autres ajoutés :     {total_others_added}\n\n"
-
-                    f"⏱️ Temps d'exécution :   {execution_time_formatted}\n\n"
-
-                    "===========================\n"
-                    "✅ Fin du résumé\n"
-                    "```"  # Fin du bloc de code
-                )
-
-                bot = Bot(token=bot_token)
-                try:
-                    bot.send_message(chat_id=chat_id, text=message, parse_mode='Markdown')
-                    print("*** Message envoyé avec succès à Telegram.")
-                except TelegramError as e:
-                    print(f"*** Échec de l'envoi du message. Code d'erreur : {e}")
-            else:
-                print("*** Le lien 'TelegramChatID' est vide ou incorrect.")
+TELEGRAM_API_URL = "https://api.telegram.org"
+NOTIFY_QUEUE_SIZE = 50  # Messages au plus par service et par exécution (les suivants sont ignorés)
+NOTIFY_DIGEST_MAX_TITLES = 20  # Titres listés par groupe dans le résumé des nouveautés
+CODE_BLOCK_MARGIN = 16  # Place réservée aux délimiteurs ``` autour de chaque message
+
+# Résultat d'une génération : totaux pour le résumé, {groupe: (nombre, premiers titres)} pour les détails
+GenerationResult = namedtuple("GenerationResult", ("total_tv_added", "total_others_added", "execution_time_formatted",
+                                                   "new_tv", "new_others"))
+
+class TelegramBackend:
+    """Bot API Telegram (sendMessage), appelée directement en HTTP."""
+    name = "Telegram"
+    max_length = 4096
+
+    def __init__(self, token, chat_id, api_url=TELEGRAM_API_URL):
+        self.token = token
+        self.chat_id = chat_id
+        self.api_url = api_url.rstrip('/')
+
+    def request(self, text):
+        # En MarkdownV2, seuls la barre oblique inverse et l'accent grave s'échappent dans un bloc ``` ;
+        # le Markdown historique n'en permet aucun et un titre contenant ` était refusé (HTTP 400)
+        text = text.replace('\\', '\\\\').replace('`', '\\`')
+        return (f"{self.api_url}/bot{self.token}/sendMessage",
+                {"chat_id": self.chat_id, "text": f"```\n{text}\n```", "parse_mode": "MarkdownV2"})
+
+class WebhookBackend:
+    """Webhook générique : POST JSON {"text": ...} (Slack, Mattermost, Home Assistant...)."""
+    name = "Webhook"
+    max_length = 4000
+
+    def __init__(self, url):
+        self.url = url
+
+    def request(self, text):
+        return self.url, {"text": text}
+
+class DiscordBackend(WebhookBackend):
+    """Webhook Discord : POST JSON {"content": ...}, 2000 caractères au plus par message."""
+    name = "Discord"
+    max_length = 2000
+
+    def request(self, text):
+        return self.url, {"content": f"```\n{text}\n```"}
+
+async def http_post_json(url, payload, timeout):
+    """POST JSON en asyncio pur (annulable, sans dépendance externe) ; renvoie le code HTTP."""
+    import asyncio  # Import différé : asyncio n'est chargé que si une notification est envoyée
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    https = parts.scheme == "https"
+    if https:
+        import ssl
+    path = parts.path or "/"
+    if parts.query:
+        path += f"?{parts.query}"
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    request = (f"POST {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nContent-Type: application/json\r\n"
+               f"Content-Length: {len(body)}\r\nUser-Agent: M3U8-STRM-GENERATOR\r\nConnection: close\r\n\r\n")
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(
+            parts.hostname, parts.port or (443 if https else 80),
+            ssl=ssl.create_default_context() if https else None)
+        try:
+            writer.write(request.encode('utf-8') + body)
+            await writer.drain()
+            status_line = await reader.readline()
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
+
+    return await asyncio.wait_for(exchange(), timeout)
+
+def pack_messages(blocks, max_length):
+    """Regroupe des blocs de texte en messages d'au plus max_length caractères (un bloc trop long est coupé)."""
+    messages = []
+    current = ""
+    for block in blocks:
+        while len(block) > max_length:
+            if current:
+                messages.append(current)
+                current = ""
+            messages.append(block[:max_length])
+            block = block[max_length:]
+        if current and len(current) + 2 + len(block) > max_length:
+            messages.append(current)
+            current = block
         else:
+            current = f"{current}\n\n{block}" if current else block
+    if current:
+        messages.append(current)
+    return messages
+
+class NotificationDispatcher:
+    """Envoi des notifications en asyncio : une file bornée par service, délai et nouvelles tentatives par
+    requête, et un délai global au-delà duquel les messages restants sont abandonnés. Un service lent ou
+    injoignable ne prolonge donc jamais l'exécution de plus de `deadline` secondes.
+    """
+
+    def __init__(self, backends, timeout=10.0, retries=2, deadline=None, queue_size=NOTIFY_QUEUE_SIZE):
+        self.backends = backends
+        self.timeout = timeout
+        self.retries = retries
+        self.deadline = deadline or self.message_deadline(timeout, retries)
+        self.queue_size = queue_size
+        self.outbox = {backend: [] for backend in backends}
+        self.stats = {"sent": 0, "failed": 0, "dropped": 0}
+
+    def submit(self, blocks):
+        """Ajoute des blocs de texte, regroupés en messages à la taille maximale de chaque service."""
+        blocks = list(blocks)
+        for backend in self.backends:
+            for message in pack_messages(blocks, backend.max_length - CODE_BLOCK_MARGIN):
+                if len(self.outbox[backend]) < self.queue_size:
+                    self.outbox[backend].append(message)
+                else:
+                    self.stats["dropped"] += 1
+
+    @staticmethod
+    def backoff(attempt):
+        """Attente exponentielle avant la nouvelle tentative n° attempt."""
+        return min(2 ** (attempt - 1), 30)
+
+    @classmethod
+    def message_deadline(cls, timeout, retries):
+        """Délai global par défaut : de quoi épuiser toutes les tentatives d'un message, attentes comprises."""
+        return timeout * (retries + 1) + sum(cls.backoff(attempt) for attempt in range(1, retries + 1))
+
+    async def send(self, backend, message):
+        import asyncio
+
+        url, payload = backend.request(message)
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff(attempt))
+            try:
+                status = await http_post_json(url, payload, self.timeout)
+            except (OSError, ValueError, IndexError, asyncio.TimeoutError) as e:
+                error = str(e) or type(e).__name__
+                continue
+            if status < 300:
+                return True
+            error = f"HTTP {status}"
+            if status < 500 and status != 429:
+                break  # Inutile de réessayer une erreur client
+        log_error(f"*** Échec de l'envoi de la notification {backend.name} : {error}")
+        return False
+
+    async def worker(self, backend, queue):
+        # Un seul envoi à la fois par service : les messages arrivent dans l'ordre
+        while True:
+            message = await queue.get()
+            try:
+                self.stats["sent" if await self.send(backend, message) else "failed"] += 1
+            finally:
+                queue.task_done()
+
+    async def run(self):
+        import asyncio
+
+        queues = {}
+        total = sum(len(messages) for messages in self.outbox.values()) + self.stats["sent"] + self.stats["failed"]
+        for backend, messages in self.outbox.items():
+            queues[backend] = asyncio.Queue(maxsize=self.queue_size)
+            for message in messages:
+                queues[backend].put_nowait(message)
+            messages.clear()
+        workers = [asyncio.create_task(self.worker(backend, queue)) for backend, queue in queues.items()]
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in queues.values())), self.deadline)
+        except asyncio.TimeoutError:
+            abandoned = total - self.stats["sent"] - self.stats["failed"]
+            self.stats["failed"] += abandoned
+            log_error(f"*** Notifications : délai de {self.deadline:g} s dépassé, {abandoned} messages abandonnés.")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def dispatch(self):
+        """Envoie les messages soumis et renvoie les statistiques (bloque au plus `deadline` secondes)."""
+        import asyncio
+
+        if any(self.outbox.values()):
+            asyncio.run(self.run())
+        return self.stats
+
+def notification_backends(config):
+    backends = []
+    if config.telegram_enabled:
+        if not config.telegram_token:
             print("*** Le lien 'TelegramBotToken' est vide ou incorrect.")
+        elif not config.telegram_chat_id:
+            print("*** Le lien 'TelegramChatID' est vide ou incorrect.")
+        else:
+            backends.append(TelegramBackend(config.telegram_token, config.telegram_chat_id, config.telegram_api_url))
+    if config.discord_webhook_url:
+        backends.append(DiscordBackend(config.discord_webhook_url))
+    if config.webhook_url:
+        backends.append(WebhookBackend(config.webhook_url))
+    return backends
+
+def summary_message(results):
+    return (
+        "📝 Résumé du traitement\n"
+        "===========================\n\n"
+
+        f"📡 Chaînes TV ajoutées : {results.total_tv_added}\n\n"
+
+        f"📁 Autres ajoutés :     {results.total_others_added}\n\n"
+
+        f"⏱️ Temps d'exécution :   {results.execution_time_formatted}\n\n"
+
+        "===========================\n"
+        "✅ Fin du résumé"
+    )
+
+def digest_blocks(results, max_titles=NOTIFY_DIGEST_MAX_TITLES):
+    """Un bloc par groupe listant ses nouveaux titres (au plus max_titles)."""
+    for icon, new_titles in (("📡", results.new_tv), ("📁", results.new_others)):
+        for group_title, (count, titles) in new_titles.items():
+            lines = [f"{icon} {group_title} : {count} nouveaux"]
+            lines.extend(f"  • {title}" for title in titles[:max_titles])
+            if count > len(titles[:max_titles]):
+                lines.append(f"  … et {count - len(titles[:max_titles])} autres")
+            yield "\n".join(lines)
+
+def send_notifications(config, results):
+    """Envoie le résumé (et, si NotifyDigest est activé, les nouveautés par groupe) aux services configurés."""
+    backends = notification_backends(config)
+    if not backends:
+        print("*** Notifications désactivées.")
+        return None
+
+    dispatcher = NotificationDispatcher(backends, config.notify_timeout, config.notify_retries, config.notify_deadline)
+    dispatcher.submit([summary_message(results)])
+    if config.notify_digest:
+        dispatcher.submit(digest_blocks(results))
+    stats = dispatcher.dispatch()
+    print(f"*** Notifications ({', '.join(backend.name for backend in backends)}) : {stats['sent']} envoyées, "
+          f"{stats['failed']} en échec, {stats['dropped']} ignorées.")
+    return stats
+
+######################################################################################################################
+                                   #Exécution complète
+######################################################################################################################
+
+def run_generation(config, group_filter, input_files, metrics, manifest=None):
+    """Téléchargement, lecture de la playlist, génération et notification ; renvoie les résultats ou None."""
+    download_enabled = config.download_enabled
+
+    if download_enabled:
+        print("*** Téléchargement du fichier M3U activé...")
+        with metrics.stage("download"):
+            download_status = download_m3u(config, group_filter)
+
+        # Playlist, configuration et filtre identiques à la dernière génération réussie : rien à faire
+        if download_status == DOWNLOAD_UNCHANGED and generation_is_current(config, input_files):
+            print("*** Playlist inchangée depuis la dernière génération, traitement ignoré.")
+            return None
     else:
-        print("*** Notifications Telegram sont désactivées.")
+        print("*** Téléchargement désactivé dans la configuration... On traite le fichier existant...")
+
+    # Vérification du fichier M3U (de chaque source) : les entrées et les groupes sont comptés
+    # pendant la planification, la playlist n'est lue qu'une fois
+    with metrics.stage("validate"):
+        for m3u_file_path in source_files(config):
+            check_m3u_file(m3u_file_path)
+
+    # Si le filtre de groupes est défini, lancer folder_generator
+    results = None
+    if group_filter:
+        results = folder_generator(config, group_filter, metrics, manifest)
+        if results and download_enabled:
+            mark_generation_done(config, input_files)
+
+    if results:
+        with metrics.stage("notify"):
+            send_notifications(config, results)
+    return results
+
+def start_profiler(config):
+    if not config.profile_enabled:
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def finish_run(config, metrics, profiler=None):
+    """Écrit les métriques (JSON et Prometheus) et, si activé, le profil cProfile de l'exécution."""
+    if profiler is not None:
+        profiler.disable()
+        os.makedirs(LOG_DIRECTORY, exist_ok=True)
+        profile_path = os.path.join(LOG_DIRECTORY, f"profile-{log_timestamp()}.pstats")
+        profiler.dump_stats(profile_path)
+        print(f"*** Profil d'exécution enregistré dans {profile_path}.")
+    metrics.write(config.metrics_file, config.metrics_prom_file)
+
+######################################################################################################################
+                                   #Mode surveillance (/WATCH)
+######################################################################################################################
+
+def file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+class WatchState:
+    """État conservé en mémoire entre deux rafraîchissements : configuration, filtre de groupes et manifeste.
+
+    Config.cfg et unwantedgroup.cfg ne sont relus que si leur date de modification change ;
+    le cache des noms nettoyés (get_sanitizer) reste lui aussi chaud d'un cycle à l'autre.
+    """
+
+    def __init__(self, config_file, unwanted_file_path, config, group_filter):
+        self.config_file = config_file
+        self.unwanted_file_path = unwanted_file_path
+        self.config = config
+        self.group_filter = group_filter
+        self.mtimes = {config_file: file_mtime(config_file), unwanted_file_path: file_mtime(unwanted_file_path)}
+        self.manifest = Manifest(config.manifest_file)
+        self.last_inputs = None  # Dates des fichiers lors de la dernière génération réussie
+
+    def reload(self):
+        """Recharge les fichiers modifiés depuis le dernier cycle (une erreur conserve l'état précédent)."""
+        mtime = file_mtime(self.config_file)
+        if mtime != self.mtimes[self.config_file]:
+            self.mtimes[self.config_file] = mtime
+            config = load_config(self.config_file)
+            if config is None:
+                print("*** La configuration 'Config.cfg' est invalide, la configuration précédente est conservée.")
+            else:
+                print("*** Config.cfg modifié : configuration rechargée.")
+                if config.manifest_file != self.config.manifest_file:
+                    self.manifest.close()
+                    self.manifest = Manifest(config.manifest_file)
+                self.config = config
+
+        mtime = file_mtime(self.unwanted_file_path)
+        if mtime != self.mtimes[self.unwanted_file_path]:
+            self.mtimes[self.unwanted_file_path] = mtime
+            group_filter = load_group_filter(self.unwanted_file_path)
+            if group_filter is None:
+                print("*** Le fichier 'unwantedgroup.cfg' est introuvable, le filtre précédent est conservé.")
+            else:
+                print("*** unwantedgroup.cfg modifié : filtre de groupes rechargé.")
+                self.group_filter = group_filter
+
+    def inputs(self):
+        return (tuple(file_mtime(path) for path in source_files(self.config)),
+                self.mtimes[self.config_file], self.mtimes[self.unwanted_file_path])
+
+    def close(self):
+        self.manifest.save()
+        self.manifest.close()
+
+def run_watch_cycle(state):
+    """Un rafraîchissement : rechargement éventuel de la configuration puis génération des seules différences."""
+    state.reload()
+    config = state.config
+
+    # Sans téléchargement, rien à faire si la playlist, Config.cfg et unwantedgroup.cfg n'ont pas changé
+    inputs = state.inputs()
+    if not config.download_enabled and inputs == state.last_inputs:
+        print("*** Aucun changement depuis le dernier rafraîchissement, traitement ignoré.")
+        return
+
+    metrics = RunMetrics()
+    profiler = start_profiler(config)
+    try:
+        run_generation(config, state.group_filter, (state.config_file, state.unwanted_file_path), metrics,
+                       state.manifest)
+        state.last_inputs = state.inputs()
+    finally:
+        finish_run(config, metrics, profiler)
+
+def run_watch(config_file, unwanted_file_path, config, group_filter):
+    """Commande /WATCH : génération toutes les WatchInterval secondes jusqu'à SIGTERM (ou Ctrl+C)."""
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        print(f"*** Signal {signal.Signals(signum).name} reçu : arrêt après le rafraîchissement en cours...")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    state = WatchState(config_file, unwanted_file_path, config, group_filter)
+    try:
+        while not stop.is_set():
+            print(f"*** Rafraîchissement du {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            try:
+                run_watch_cycle(state)
+            except Exception as e:
+                log_error(f"*** Erreur lors du rafraîchissement : {e}")
+            stop.wait(state.config.watch_interval)
+    finally:
+        state.close()
+    print("*** Mode surveillance arrêté.")
 
 ######################################################################################################################
                                    #Derouler du script Logic
@@ -714,45 +3020,62 @@ if __name__ == "__main__":
         print("*** Veuillez exécuter le script avec '/C' pour créer le fichier de configuration.")
         sys.exit(1)
 
-    # Charger la configuration
+    # Charger la configuration (une seule fois pour toute l'exécution)
     try:
         config = load_config(config_file)
     except Exception as e:
         log_error(f"*** Erreur lors du chargement de la configuration : {e}")
         sys.exit(1)
+    if config is None:
+        print("*** La configuration 'Config.cfg' est invalide, voir error.txt.")
+        sys.exit(1)
 
     # Vérifier l'argument /U pour générer unwantedgroup.cfg
     if len(sys.argv) > 1 and sys.argv[1] == "/U":
         print("*** Commande '/U' détectée : Récupération des groupes indésirables...")
-        generate_unwanted_group_file(config_file)
+        generate_unwanted_group_file(config)
         print("*** Le fichier 'unwantedgroup.cfg' a été généré avec succès.")
         sys.exit(0)
 
-    # Vérifier si unwantedgroup.cfg existe
-    unwanted_group = read_unwanted_group(unwanted_file_path)
-    if unwanted_group is None:
+    # Vérifier l'argument /REBUILD pour réconcilier le manifeste avec l'arborescence
+    if len(sys.argv) > 1 and sys.argv[1] == "/REBUILD":
+        print("*** Commande '/REBUILD' détectée : Réconciliation du manifeste avec les fichiers existants...")
+        try:
+            rebuild_manifest(config)
+        except Exception as e:
+            log_error(f"*** Erreur lors de la reconstruction du manifeste : {e}")
+            sys.exit(1)
+        sys.exit(0)
+
+    # Vérifier si unwantedgroup.cfg existe (chargé une seule fois pour toute l'exécution)
+    group_filter = load_group_filter(unwanted_file_path)
+    if group_filter is None:
         print("*** Le fichier 'unwantedgroup.cfg' n'existe pas.")
         print("*** Veuillez exécuter le script avec l'option '/U' pour le générer.")
         sys.exit(1)
 
-    # Suite du traitement
-    download_enabled = config.get("DownloadM3U8Enabled")
-    m3u_file_path = config.get("m3u8File")
-
-    if download_enabled:
-        print("*** Téléchargement du fichier M3U activé...")
-        download_m3u(config)
-    else:
-        print("*** Téléchargement désactivé dans la configuration... On traite le fichier existant...")
-
-    # Traitement du fichier M3U
-    process_m3u_file(m3u_file_path)
+    # Vérifier l'argument /PLAN pour afficher les opérations d'une génération sans rien écrire
+    if len(sys.argv) > 1 and sys.argv[1] == "/PLAN":
+        print("*** Commande '/PLAN' détectée : Simulation de la génération...")
+        try:
+            run_plan(config, group_filter, sys.argv[2] if len(sys.argv) > 2 else None)
+        except Exception as e:
+            log_error(f"*** Erreur lors de la simulation : {e}")
+            sys.exit(1)
+        sys.exit(0)
 
-    # Si unwanted_group est défini, lancer folder_generator
-    if unwanted_group:
-        total_tv_added, total_others_added, execution_time_formatted = folder_generator()
+    # Vérifier l'argument /WATCH pour rester actif et rafraîchir la playlist à intervalle régulier
+    if len(sys.argv) > 1 and sys.argv[1] == "/WATCH":
+        print(f"*** Commande '/WATCH' détectée : rafraîchissement toutes les {config.watch_interval:g} secondes...")
+        run_watch(config_file, unwanted_file_path, config, group_filter)
+        sys.exit(0)
 
-    if folder_generator:
-        Telegram_Notification(total_tv_added, total_others_added, execution_time_formatted)
+    # Suite du traitement : métriques (et profilage optionnel) écrites à la fin de chaque exécution
+    metrics = RunMetrics()
+    profiler = start_profiler(config)
+    try:
+        run_generation(config, group_filter, (config_file, unwanted_file_path), metrics)
+    finally:
+        finish_run(config, metrics, profiler)
 
     print("*** End of Script.")
@@ -0,0 +1,168 @@
+"""Téléchargement de la playlist (fetch_playlist) contre un serveur HTTP local de substitution."""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Script  # noqa: E402
+
+PLAYLIST = ("#EXTM3U\n" + "".join(
+    f'#EXTINF:-1 tvg-name="FR - Chaîne {index}" group-title="|FR| TNT",Chaîne {index}\n'
+    f"http://example.invalid/live/{index}.ts\n" for index in range(200))).encode('utf-8')
+
+
+class PlaylistStandInHandler(BaseHTTPRequestHandler):
+    """get.php : playlist server.body avec ETag, requêtes conditionnelles et Range / If-Range."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if not self.path.startswith("/get.php"):
+            self.send_error(404)
+            return
+        body = server.body
+        if server.honour_etag and self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.end_headers()
+            return
+
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") == server.etag:
+            start = int(range_header[len("bytes="):].rstrip("-"))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+            body = body[start:]
+        else:
+            self.send_response(200)
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PlaylistStandInHandler)
+    server.body = PLAYLIST
+    server.etag = '"v1"'
+    server.honour_etag = True
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_port}/get.php"
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def playlist_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # error.txt est écrit dans le dossier courant
+    return str(tmp_path / "original.m3u8")
+
+
+def read(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def write_partial(path, content, validator):
+    """Simule un téléchargement interrompu : .part et validateur enregistrés dans les métadonnées."""
+    with open(f"{path}.part", 'wb') as part_file:
+        part_file.write(content)
+    Script.save_download_meta(path, {"part_validator": validator})
+
+
+def test_first_download(server, playlist_path):
+    assert Script.fetch_playlist(server.url, playlist_path, retries=0) == Script.DOWNLOAD_UPDATED
+    assert read(playlist_path) == PLAYLIST
+    assert not os.path.exists(f"{playlist_path}.part")
+    meta = Script.load_download_meta(playlist_path)
+    assert meta["etag"] == '"v1"' and "part_validator" not in meta
+
+
+def test_not_modified(server, playlist_path):
+    Script.fetch_playlist(server.url, playlist_path, retries=0)
+    assert Script.fetch_playlist(server.url, playlist_path, retries=0) == Script.DOWNLOAD_UNCHANGED
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    assert read(playlist_path) == PLAYLIST
+
+
+def test_same_content_keeps_file(server, playlist_path):
+    Script.fetch_playlist(server.url, playlist_path, retries=0)
+    os.utime(playlist_path, (1_000_000, 1_000_000))
+    server.honour_etag = False  # Le serveur renvoie tout : l'empreinte sha256 décide
+    assert Script.fetch_playlist(server.url, playlist_path, retries=0) == Script.DOWNLOAD_UNCHANGED
+    assert os.path.getmtime(playlist_path) == 1_000_000
+    assert not os.path.exists(f"{playlist_path}.part")
+
+
+def test_changed_content(server, playlist_path):
+    Script.fetch_playlist(server.url, playlist_path, retries=0)
+    server.body = PLAYLIST + b"#EXTINF:-1,Nouvelle\nhttp://example.invalid/new.ts\n"
+    server.etag = '"v2"'
+    assert Script.fetch_playlist(server.url, playlist_path, retries=0) == Script.DOWNLOAD_UPDATED
+    assert read(playlist_path) == server.body
+
+
+def test_range_resume(server, playlist_path):
+    write_partial(playlist_path, PLAYLIST[:1000], '"v1"')
+    assert Script.fetch_playlist(server.url, playlist_path, retries=0) == Script.DOWNLOAD_UPDATED
+    assert server.requests[0]["Range"] == "bytes=1000-"
+    assert read(playlist_path) == PLAYLIST
+    assert Script.load_download_meta(playlist_path)["sha256"] == Script.hash_file(playlist_path).hexdigest()
+
+
+def test_resume_with_outdated_validator(server, playlist_path):
+    write_partial(playlist_path, b"ancienne version", '"v0"')  # If-Range ne correspond plus : 200 complet
+    assert Script.fetch_playlist(server.url, playlist_path, retries=0) == Script.DOWNLOAD_UPDATED
+    assert read(playlist_path) == PLAYLIST
+
+
+def test_complete_part_is_finalised(server, playlist_path):
+    write_partial(playlist_path, PLAYLIST, '"v1"')  # Arrêt entre la fin du flux et os.replace
+    assert Script.fetch_playlist(server.url, playlist_path, retries=0) == Script.DOWNLOAD_UPDATED
+    assert read(playlist_path) == PLAYLIST
+    assert not os.path.exists(f"{playlist_path}.part")
+    meta = Script.load_download_meta(playlist_path)
+    assert meta["etag"] == '"v1"' and "part_validator" not in meta
+    assert Script.fetch_playlist(server.url, playlist_path, retries=0) == Script.DOWNLOAD_UNCHANGED
+
+
+def test_oversized_part_is_discarded(server, playlist_path):
+    write_partial(playlist_path, PLAYLIST + b"octets en trop", '"v1"')
+    assert Script.fetch_playlist(server.url, playlist_path, retries=0) == Script.DOWNLOAD_UPDATED
+    assert [request.get("Range") for request in server.requests] == [f"bytes={len(PLAYLIST) + 14}-", None]
+    assert read(playlist_path) == PLAYLIST
+    assert not os.path.exists(f"{playlist_path}.part")
+
+
+def test_client_error(server, playlist_path):
+    url = server.url.replace("get.php", "missing.php")
+    assert Script.fetch_playlist(url, playlist_path, retries=0) == Script.DOWNLOAD_FAILED
+    assert not os.path.exists(playlist_path)
+
+
+def test_compressed_download(server, playlist_path):
+    assert Script.fetch_playlist(server.url, playlist_path, retries=0, compress=True) == Script.DOWNLOAD_UPDATED
+    with Script.open_playlist(playlist_path) as file:
+        assert file.read() == PLAYLIST.decode('utf-8')
+    assert json.loads(read(Script.download_meta_path(playlist_path)))["sha256"] \
+        == Script.hashlib.sha256(PLAYLIST).hexdigest()
@@ -0,0 +1,76 @@
+"""Compare NameSanitizer aux fonctions de nettoyage d'origine (avant la précompilation)."""
+
+import os
+import re
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import Script  # noqa: E402
+
+PREFIXES = Script.parse_prefixes("FR - ,UK - ,DE - ,ES - ")
+EXAMPLE_PLAYLIST = os.path.join(ROOT, "example-original.m3u8")
+
+# Noms supplémentaires couvrant les cas limites (caractères interdits, espaces, 4K, préfixes répétés)
+EXTRA_NAMES = (
+    "FR - Film: Le Retour / Partie 2 (2019) 4K",
+    "  UK -   Doctor   Who?  S01 E01 ",
+    "DE - DE - Tatort 4k",
+    "<ES -> La Casa de Papel *",
+    ':"FR - Lupin|" S01 E03',
+    "Série sans préfixe.mkv",
+    "",
+)
+
+# Seule différence voulue : les préfixes ne sont plus retirés au milieu du nom
+# (l'ancien code utilisait str.replace sur toute la chaîne).
+ALLOWED_DIFFERENCES = {
+    # nom : (résultat d'origine, résultat actuel)
+    "Le Bureau des Légendes FR - VOSTFR": ("Le Bureau des Légendes VOSTFR", "Le Bureau des Légendes FR - VOSTFR"),
+}
+
+
+def baseline_clean_directory_name(name, prefixes):
+    for prefix in prefixes:
+        name = name.replace(prefix, '')
+    name = re.sub(r'[<>:"/\\|?*.]', '', name)
+    name = re.sub(r'\s+', ' ', name).strip()
+    name = name.replace('4K', 'UHD').replace('4k', 'UHD')
+    return name
+
+
+def baseline_clean_file_name(name, prefixes):
+    for prefix in prefixes:
+        name = name.replace(prefix, '')
+    name = re.sub(r'[<>:"/\\|?*:.]', '', name)
+    name = name.replace('4K', 'UHD').replace('4k', 'UHD')
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+def example_names():
+    names = []
+    for entry in Script.iter_m3u_entries(EXAMPLE_PLAYLIST):
+        names.extend((entry.tvg_name, entry.group_title, entry.display_name))
+    return names
+
+
+def test_example_playlist_is_not_empty():
+    assert len(example_names()) >= 30
+
+
+@pytest.mark.parametrize("name", example_names() + list(EXTRA_NAMES))
+def test_same_result_as_baseline(name):
+    assert Script.clean_file_name(name, PREFIXES) == baseline_clean_file_name(name, PREFIXES)
+    assert Script.clean_directory_name(name, PREFIXES) == baseline_clean_directory_name(name, PREFIXES)
+
+
+@pytest.mark.parametrize("name, expected", ALLOWED_DIFFERENCES.items())
+def test_mid_string_prefix_is_kept(name, expected):
+    baseline, current = expected
+    assert baseline_clean_file_name(name, PREFIXES) == baseline
+    assert baseline_clean_directory_name(name, PREFIXES) == baseline
+    assert Script.clean_file_name(name, PREFIXES) == current
+    assert Script.clean_directory_name(name, PREFIXES) == current
@@ -0,0 +1,130 @@
+"""Envoi des notifications (NotificationDispatcher) contre un serveur HTTP local de substitution."""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Benchmark  # noqa: E402
+import Script  # noqa: E402
+
+
+class NotifyStandInHandler(BaseHTTPRequestHandler):
+    """Enregistre (chemin, JSON, heure) de chaque POST ; répond avec les codes de server.statuses puis 200."""
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.received.append((self.path, payload, time.monotonic()))
+            status = server.statuses.pop(0) if server.statuses else 200
+        if server.delay:
+            time.sleep(server.delay)  # Service injoignable : aucune réponse avant le délai
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # error.txt est écrit dans le dossier courant
+    server = ThreadingHTTPServer(("127.0.0.1", 0), NotifyStandInHandler)
+    server.lock = threading.Lock()
+    server.received = []
+    server.statuses = []
+    server.delay = 0
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(Script.NotificationDispatcher, "backoff", staticmethod(lambda attempt: 0.1 * attempt))
+
+
+def results(new_tv=None):
+    return Script.GenerationResult(3, 5, "0h 0m 1s", new_tv or {}, {})
+
+
+def test_send_notifications_to_every_backend(server):
+    config = Benchmark.make_context(
+        ".", telegram_enabled=True, telegram_token="123:abc", telegram_chat_id="42",
+        telegram_api_url=server.url, discord_webhook_url=f"{server.url}/discord", webhook_url=f"{server.url}/hook")
+    stats = Script.send_notifications(config, results())
+    assert stats == {"sent": 3, "failed": 0, "dropped": 0}
+
+    received = {path: payload for path, payload, _ in server.received}
+    summary = Script.summary_message(results())
+    assert received["/bot123:abc/sendMessage"] == {"chat_id": "42", "text": f"```\n{summary}\n```",
+                                                   "parse_mode": "MarkdownV2"}
+    assert received["/discord"] == {"content": f"```\n{summary}\n```"}
+    assert received["/hook"] == {"text": summary}
+
+
+def test_digest_is_sent_after_summary(server):
+    config = Benchmark.make_context(".", webhook_url=f"{server.url}/hook", notify_digest=True)
+    Script.send_notifications(config, results({"|FR| TNT": (2, ["TF1", "France 2"])}))
+    texts = [payload["text"] for _, payload, _ in server.received]
+    assert texts[0] == Script.summary_message(results())
+    assert "|FR| TNT : 2 nouveaux" in texts[1] and "• France 2" in texts[1]
+
+
+def test_telegram_markdown_escaping(server):
+    backend = Script.TelegramBackend("123:abc", "42", server.url)
+    dispatcher = Script.NotificationDispatcher([backend])
+    dispatcher.submit(["Film `spécial` C:\\chemin"])
+    assert dispatcher.dispatch()["sent"] == 1
+    assert server.received[0][1]["text"] == "```\nFilm \\`spécial\\` C:\\\\chemin\n```"
+
+
+def test_retry_with_backoff_on_server_error(server, fast_backoff):
+    server.statuses = [503, 502]
+    dispatcher = Script.NotificationDispatcher([Script.WebhookBackend(server.url)], timeout=1, retries=2)
+    dispatcher.submit(["message"])
+    assert dispatcher.dispatch() == {"sent": 1, "failed": 0, "dropped": 0}
+    times = [received_at for _, _, received_at in server.received]
+    assert len(times) == 3
+    assert times[1] - times[0] >= 0.1 and times[2] - times[1] >= 0.2
+
+
+def test_client_error_is_not_retried(server, fast_backoff):
+    server.statuses = [400]
+    dispatcher = Script.NotificationDispatcher([Script.WebhookBackend(server.url)], timeout=1, retries=2)
+    dispatcher.submit(["message"])
+    assert dispatcher.dispatch() == {"sent": 0, "failed": 1, "dropped": 0}
+    assert len(server.received) == 1
+
+
+def test_deadline_abandons_hanging_endpoint(server):
+    server.delay = 3
+    dispatcher = Script.NotificationDispatcher([Script.WebhookBackend(server.url)], timeout=10, retries=2,
+                                               deadline=0.5)
+    dispatcher.submit(["premier", "second"])
+    started = time.monotonic()
+    stats = dispatcher.dispatch()
+    assert time.monotonic() - started < 2
+    assert stats == {"sent": 0, "failed": 1, "dropped": 0}  # Les deux blocs tiennent dans un seul message
+
+
+def test_default_deadline_covers_every_retry():
+    assert Script.NotificationDispatcher.backoff(1) == 1 and Script.NotificationDispatcher.backoff(2) == 2
+    assert Script.NotificationDispatcher([], timeout=10, retries=2).deadline == 10 * 3 + 1 + 2
+    assert Script.NotificationDispatcher([], timeout=10, retries=2, deadline=5).deadline == 5
+
+
+def test_full_queue_drops_messages(server):
+    dispatcher = Script.NotificationDispatcher([Script.WebhookBackend(server.url)], queue_size=2)
+    dispatcher.submit(["a" * 3000, "b" * 3000, "c" * 3000])
+    assert dispatcher.dispatch() == {"sent": 2, "failed": 0, "dropped": 1}
@@ -0,0 +1,88 @@
+"""/PLAN annonce exactement les écritures de la génération suivante."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Benchmark  # noqa: E402
+import Script  # noqa: E402
+
+PLAYLIST = (
+    ("|FR| TNT", "FR - TF1"),
+    ("VOD - FR", "Film (2020)"),
+    ("SRS - FR", "Show S01 E01"),
+    ("SRS - FR", "Show S01 E02"),
+    ("SRS - FR", "Autre S02 E01"),
+)
+
+
+@pytest.fixture
+def work(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Journaux et error.txt sont écrits dans le dossier courant
+    os.makedirs(tmp_path / "out")
+    playlist = tmp_path / "playlist.m3u8"
+    with open(playlist, 'w', encoding='utf-8') as file:
+        file.write("#EXTM3U\n")
+        for group_title, name in PLAYLIST:
+            file.write(f'#EXTINF:-1 tvg-name="{name}" group-title="{group_title}",{name}\nhttp://example.invalid/{name}\n')
+    return tmp_path
+
+
+def context(work, **overrides):
+    return Benchmark.make_context(str(work / "out"), m3u8_file=str(work / "playlist.m3u8"), season_folders=True,
+                                  **overrides)
+
+
+def planned(config, action):
+    manifest = Script.Manifest(config.manifest_file, read_only=True)
+    try:
+        plan = Script.build_write_plan(config, Script.GroupFilter(), manifest)
+        return sorted(operation["path"] for operation in Script.iter_plan_operations(plan, manifest, config)
+                      if operation["action"] == action)
+    finally:
+        manifest.close()
+
+
+def nfo_files(work):
+    return sorted(path for path, _ in Script.iter_strm_files(str(work / "out"), ("OTHERS",), nfo=True)
+                  if path.endswith(Script.SERIES_NFO_FILE))
+
+
+def series_nfo(series):
+    return os.path.join("OTHERS", "SRS - FR", series, Script.SERIES_NFO_FILE)
+
+
+def test_plan_predicts_nfo_on_existing_tree(work):
+    Script.folder_generator(context(work), Script.GroupFilter())  # Arborescence existante, SeriesNfo désactivé
+    assert nfo_files(work) == []
+
+    config = context(work, series_nfo=True)
+    expected = [series_nfo("Autre"), series_nfo("Show")]
+    assert planned(config, Script.PLAN_NFO) == expected
+    Script.folder_generator(config, Script.GroupFilter())
+    assert nfo_files(work) == expected
+    assert planned(config, Script.PLAN_NFO) == []
+
+
+def test_existing_nfo_is_recorded_not_rewritten(work):
+    config = context(work, series_nfo=True)
+    os.makedirs(work / "out" / "OTHERS" / "SRS - FR" / "Show")
+    with open(work / "out" / series_nfo("Show"), 'w', encoding='utf-8') as nfo_file:
+        nfo_file.write("<tvshow><title>Modifié à la main</title></tvshow>")
+
+    Script.folder_generator(config, Script.GroupFilter())
+    with open(work / "out" / series_nfo("Show"), encoding='utf-8') as nfo_file:
+        assert "Modifié à la main" in nfo_file.read()
+    assert planned(config, Script.PLAN_NFO) == []
+
+
+def test_rebuild_records_nfo(work):
+    config = context(work, series_nfo=True)
+    Script.folder_generator(config, Script.GroupFilter())
+    os.remove(config.manifest_file)
+    Script.rebuild_manifest(config)
+    assert planned(config, Script.PLAN_NFO) == []
+    assert planned(config, Script.PLAN_CREATE) == []
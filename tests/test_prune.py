@@ -0,0 +1,112 @@
+"""Nettoyage des .strm orphelins (prune_orphans) et des dossiers devenus vides."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Benchmark  # noqa: E402
+import Script  # noqa: E402
+
+FULL_PLAYLIST = (
+    ("|FR| TNT", "FR - TF1"),
+    ("|FR| TNT", "FR - M6"),
+    ("VOD - FR", "Film (2020)"),
+    ("SRS - FR", "Show S01 E01"),
+)
+
+
+@pytest.fixture
+def work(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Journaux et error.txt sont écrits dans le dossier courant
+    os.makedirs(tmp_path / "out")
+    return tmp_path
+
+
+def generate(work, entries, **overrides):
+    """Écrit la playlist puis lance une génération avec nettoyage."""
+    playlist = work / "playlist.m3u8"
+    with open(playlist, 'w', encoding='utf-8') as file:
+        file.write("#EXTM3U\n")
+        for group_title, name in entries:
+            file.write(f'#EXTINF:-1 tvg-name="{name}" group-title="{group_title}",{name}\nhttp://example.invalid/{name}\n')
+    values = dict(m3u8_file=str(playlist), prune_enabled=True, prune_max_percent=100.0)
+    values.update(overrides)
+    config = Benchmark.make_context(str(work / "out"), **values)
+    assert Script.folder_generator(config, Script.GroupFilter()) is not None
+    return config
+
+
+def tree(out_directory):
+    """Chemins relatifs des fichiers et dossiers sous OutDirectory (manifeste exclu)."""
+    paths = set()
+    for root, directories, files in os.walk(out_directory):
+        for name in directories + files:
+            paths.add(os.path.relpath(os.path.join(root, name), out_directory))
+    paths.discard("manifest.db")
+    return paths
+
+
+def manifest_paths(config):
+    manifest = Script.Manifest(config.manifest_file, read_only=True)
+    try:
+        return set(manifest.entries)
+    finally:
+        manifest.close()
+
+
+def test_prune_deletes_only_manifest_paths(work):
+    generate(work, FULL_PLAYLIST)
+    # Fichiers ajoutés à la main : inconnus du manifeste, jamais supprimés
+    with open(work / "out" / "TV" / "FR TNT" / "Perso.strm", 'w', encoding='utf-8') as file:
+        file.write("http://example.invalid/perso\n")
+    os.makedirs(work / "out" / "OTHERS" / "Archives")
+
+    config = generate(work, FULL_PLAYLIST[:1])
+    assert tree(work / "out") == {
+        "TV", os.path.join("TV", "FR TNT"), os.path.join("TV", "FR TNT", "TF1.strm"),
+        os.path.join("TV", "FR TNT", "Perso.strm"), "OTHERS", os.path.join("OTHERS", "Archives"),
+    }
+    assert manifest_paths(config) == {os.path.join("TV", "FR TNT", "TF1.strm")}
+
+
+def test_prune_stops_at_tv_and_others(work):
+    generate(work, FULL_PLAYLIST)
+    generate(work, ())
+    assert tree(work / "out") == {"TV", "OTHERS"}
+
+
+def test_prune_dry_run(work, capsys):
+    generate(work, FULL_PLAYLIST)
+    before = tree(work / "out")
+    config = generate(work, FULL_PLAYLIST[:1], prune_dry_run=True)
+    assert tree(work / "out") == before
+    assert len(manifest_paths(config)) == len(FULL_PLAYLIST)
+    assert "[Simulation] 3 fichiers .strm seraient supprimés." in capsys.readouterr().out
+
+
+def test_prune_max_percent_aborts(work):
+    generate(work, FULL_PLAYLIST)
+    before = tree(work / "out")
+    config = generate(work, FULL_PLAYLIST[:1], prune_max_percent=50.0)  # 3 fichiers sur 4 : 75 %
+    assert tree(work / "out") == before
+    assert len(manifest_paths(config)) == len(FULL_PLAYLIST)
+    with open(work / "error.txt", encoding='utf-8') as error_file:
+        assert "Nettoyage annulé : 3 fichiers sur 4 (75.0 %)" in error_file.read()
+
+
+def test_remove_empty_directories(tmp_path):
+    for directory in ("TV/A/B", "OTHERS/SRS - FR/Show", "OTHERS/VOD - FR/Film"):
+        os.makedirs(tmp_path / directory)
+    (tmp_path / "OTHERS/SRS - FR/Show" / Script.SERIES_NFO_FILE).write_text("<tvshow/>", encoding='utf-8')
+    (tmp_path / "OTHERS/VOD - FR/Film/poster.jpg").write_bytes(b"")
+
+    removed = Script.remove_empty_directories(str(tmp_path), [
+        os.path.join("TV", "A", "B"), os.path.join("OTHERS", "SRS - FR", "Show"),
+        os.path.join("OTHERS", "VOD - FR", "Film")])
+    assert removed == 4  # TV/A/B, TV/A, la série (tvshow.nfo seul) et son groupe
+    assert tree(tmp_path) == {"TV", "OTHERS", os.path.join("OTHERS", "VOD - FR"),
+                              os.path.join("OTHERS", "VOD - FR", "Film"),
+                              os.path.join("OTHERS", "VOD - FR", "Film", "poster.jpg")}
@@ -0,0 +1,68 @@
+"""Journaux des nouveaux titres (ResultsLog) : un en-tête par groupe, comme log_results d'origine."""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Script  # noqa: E402
+
+# Playlist non triée : les groupes alternent
+INTERLEAVED = [("|FR| TNT" if index % 3 else "|UK| NEWS", f"Chaîne {index}") for index in range(30)]
+
+
+@pytest.fixture(params=[Script.LOG_BUFFER_SIZE, 40], ids=["tampon", "vidages"])
+def results_log(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(Script, "LOG_BUFFER_SIZE", request.param)
+    return Script.ResultsLog(str(tmp_path))
+
+
+def baseline_log(now, groups):
+    """Contenu écrit par log_results (version d'origine) pour {groupe: titres}."""
+    text = f"Log pour {now}\n"
+    for group_title, titles in groups.items():
+        text += f"--------------------\n{group_title}\n" + "\n".join(titles) + "\n"
+    return text + "---------------------------------------------------\n"
+
+
+def read_log(results_log, kind):
+    with open(results_log._path(kind), encoding='utf-8') as log_file:
+        return log_file.read()
+
+
+def test_one_header_per_group(results_log):
+    for group_title, title in INTERLEAVED:
+        results_log.add(Script.GROUP_TV, group_title, title)
+    results_log.close()
+
+    groups = {}
+    for group_title, title in INTERLEAVED:
+        groups.setdefault(group_title, []).append(title)
+    assert read_log(results_log, Script.GROUP_TV) == baseline_log(results_log.now, groups)
+    assert not os.path.exists(results_log._path(Script.GROUP_OTHERS))
+    assert os.listdir(results_log.log_directory) == [os.path.basename(results_log._path(Script.GROUP_TV))]
+    assert results_log.total(Script.GROUP_TV) == 30
+    assert results_log.digest(Script.GROUP_TV)["|UK| NEWS"][0] == 10
+
+
+def test_restore_drops_titles_after_checkpoint(results_log):
+    for group_title, title in INTERLEAVED[:20]:
+        results_log.add(Script.GROUP_OTHERS, group_title, title)
+    state = json.loads(json.dumps(results_log.state()))  # Comme dans la table checkpoint du manifeste
+    for group_title, title in INTERLEAVED[20:25]:
+        results_log.add(Script.GROUP_OTHERS, group_title, f"{title} (perdu)")
+    results_log.state()  # Vidé sur le disque, puis l'exécution est interrompue
+
+    resumed = Script.ResultsLog.restore(state, results_log.log_directory)
+    for group_title, title in INTERLEAVED[20:]:
+        resumed.add(Script.GROUP_OTHERS, group_title, title)
+    resumed.close()
+
+    groups = {}
+    for group_title, title in INTERLEAVED:
+        groups.setdefault(group_title, []).append(title)
+    assert read_log(resumed, Script.GROUP_OTHERS) == baseline_log(resumed.now, groups)
+    assert resumed.total(Script.GROUP_OTHERS) == 30